@@ -1,16 +1,27 @@
 import os
 import tempfile
 from werkzeug.utils import secure_filename
-from flask import Flask, request, render_template, redirect, url_for, flash
+from flask import Flask, Response, request, render_template, stream_template, stream_with_context, redirect, url_for, flash, jsonify, abort
 from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.orm import joinedload
 
 from database import db
-from models import Document, Page, ExtractionRule, ExtractionResult
+from models import Document, Page, RuleSet, ExtractionRule, ExtractionResult, ExtractionRun, IngestionJob, UploadSession
 from processors.document_processor import DocumentProcessor
 from processors.pdf_processor import PDFProcessor
 from processors.docx_processor import DocxProcessor
 from processors.image_processor import ImageProcessor
+from processors.ocr_pipeline import OCRPipeline
+from processors.page_classifier import PageClassifier
 from extractors.pattern_extractor import PatternExtractor
+from extractors.nlp_extractor import NLPExtractor, load_pattern_library
+from search_index import PageSearchIndex
+from rule_sets import RuleSetStore
+from exports import iter_run_rows, iter_csv, iter_jsonl, iter_xlsx
+from uploads import ChunkedUploadStore, UploadOffsetError
+from workers.job_queue import IngestionJobHandler, WorkerPool
+from workers.extraction_runs import ExtractionRunHandler
+from workers.nlp_service import NLPServiceClient, service_authkey
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -19,28 +30,172 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure database
 db_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'instance', 'docprocessor.db')
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", f"sqlite:///{db_path}")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Background workers write to the same SQLite file, so wait for locks instead of failing.
+# The timeout connect arg only exists for SQLite; other drivers reject it.
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"connect_args": {"timeout": 30}}
 db.init_app(app)
 
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(tempfile.gettempdir(), 'doc_processor_uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
+# Limits a single request; larger files are sent in chunks through /uploads
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+app.config['UPLOAD_CHUNK_SIZE'] = min(
+    int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)),
+    app.config['MAX_CONTENT_LENGTH']
+)
+app.config['MAX_UPLOAD_SIZE'] = int(os.environ.get('MAX_UPLOAD_SIZE', 2 * 1024 * 1024 * 1024))  # 2 GB per chunked upload
+# Seconds an unfinished chunked upload may sit idle before it and its partial file are deleted
+app.config['UPLOAD_EXPIRY'] = int(os.environ.get('UPLOAD_EXPIRY', 24 * 60 * 60))
+upload_store = ChunkedUploadStore(UPLOAD_FOLDER)
+
+# Export formats: (encoder, mimetype)
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson; charset=utf-8'),
+    'xlsx': (iter_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
 
 # Configure allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'jpg', 'jpeg', 'png'}
 
+# Configure OCR parallelism, splitting the cores between the ingestion workers
+app.config['INGESTION_WORKERS'] = int(os.environ.get('INGESTION_WORKERS', 2))
+app.config['OCR_WORKERS'] = int(os.environ.get(
+    'OCR_WORKERS',
+    max(1, (os.cpu_count() or 1) // app.config['INGESTION_WORKERS'])
+))
+app.config['OCR_MAX_INFLIGHT_PAGES'] = int(os.environ.get('OCR_MAX_INFLIGHT_PAGES', 0)) or None
+
+# Scanned PDF pages are rendered at OCR_DPI and re-rendered at OCR_RETRY_DPI when the mean
+# tesseract confidence is below OCR_MIN_CONFIDENCE. OCR_*_PROFILE picks the tesseract
+# psm/oem and preprocessing per document type (see processors.ocr_pipeline.OCR_PROFILES),
+# OCR_PSM/OCR_OEM override the profiles
+app.config['OCR_DPI'] = int(os.environ.get('OCR_DPI', 200))
+app.config['OCR_RETRY_DPI'] = int(os.environ.get('OCR_RETRY_DPI', 300))  # 0 disables the retry
+app.config['OCR_MIN_CONFIDENCE'] = float(os.environ.get('OCR_MIN_CONFIDENCE', 70))
+app.config['OCR_PDF_PROFILE'] = os.environ.get('OCR_PDF_PROFILE', 'document')
+app.config['OCR_IMAGE_PROFILE'] = os.environ.get('OCR_IMAGE_PROFILE', 'photo')
+app.config['OCR_PSM'] = int(os.environ['OCR_PSM']) if os.environ.get('OCR_PSM') else None
+app.config['OCR_OEM'] = int(os.environ['OCR_OEM']) if os.environ.get('OCR_OEM') else None
+app.config['OCR_LANG'] = os.environ.get('OCR_LANG', 'eng')
+
+# PDF pages whose text layer scores below PDF_MIN_TEXT_QUALITY (0-1) are OCRed, as are pages
+# that only have images; short text pages such as covers and signature pages are kept
+app.config['PDF_MIN_TEXT_QUALITY'] = float(os.environ.get('PDF_MIN_TEXT_QUALITY', 0.6))
+
+# Library reading PDF text layers: pypdf2 (default), pdfminer, pypdfium2, pdftotext (poppler)
+# or auto for the fastest one installed; see benchmarks/bench_pdf_engines.py
+app.config['PDF_TEXT_ENGINE'] = os.environ.get('PDF_TEXT_ENGINE', 'pypdf2')
+
+# Pages are extracted and stored as a stream: PDFs are read PDF_PAGE_WINDOW pages at a time
+# and pages are committed INGEST_PAGE_BATCH_SIZE at a time, bounding memory per document
+app.config['PDF_PAGE_WINDOW'] = int(os.environ.get('PDF_PAGE_WINDOW', 64))
+app.config['INGEST_PAGE_BATCH_SIZE'] = int(os.environ.get('INGEST_PAGE_BATCH_SIZE', 100))
+
+# DOCX files are split into pages at page and section breaks, capped at DOCX_MAX_PAGE_CHARS;
+# DOCX_PAGINATE=0 restores the old behaviour of one page per document
+app.config['DOCX_PAGINATE'] = os.environ.get('DOCX_PAGINATE', '1').lower() in ('1', 'true', 'yes')
+app.config['DOCX_MAX_PAGE_CHARS'] = int(os.environ.get('DOCX_MAX_PAGE_CHARS', 4000))
+
+
+def build_ocr_pipeline(profile):
+    """Create the OCR pipeline for a document type from its profile and the OCR settings"""
+    return OCRPipeline.from_profile(
+        profile,
+        psm=app.config['OCR_PSM'],
+        oem=app.config['OCR_OEM'],
+        lang=app.config['OCR_LANG'],
+        min_confidence=app.config['OCR_MIN_CONFIDENCE'],
+        retry_dpi=app.config['OCR_RETRY_DPI']
+    )
+
+
 # Initialize processors
 document_processor = DocumentProcessor([
-    PDFProcessor(),
-    DocxProcessor(),
-    ImageProcessor()
-])
+    PDFProcessor(
+        ocr_workers=app.config['OCR_WORKERS'],
+        max_inflight_pages=app.config['OCR_MAX_INFLIGHT_PAGES'],
+        ocr_dpi=app.config['OCR_DPI'],
+        page_window=app.config['PDF_PAGE_WINDOW'],
+        ocr_pipeline=build_ocr_pipeline(app.config['OCR_PDF_PROFILE']),
+        page_classifier=PageClassifier(min_quality=app.config['PDF_MIN_TEXT_QUALITY']),
+        text_engine=app.config['PDF_TEXT_ENGINE']
+    ),
+    DocxProcessor(
+        paginate=app.config['DOCX_PAGINATE'],
+        max_page_chars=app.config['DOCX_MAX_PAGE_CHARS']
+    ),
+    ImageProcessor(ocr_pipeline=build_ocr_pipeline(app.config['OCR_IMAGE_PROFILE']))
+], page_batch_size=app.config['INGEST_PAGE_BATCH_SIZE'])
+
+# Configure batched spaCy processing for nlp rules
+app.config['NLP_BATCH_SIZE'] = int(os.environ.get('NLP_BATCH_SIZE', 64))
+app.config['NLP_N_PROCESS'] = int(os.environ.get('NLP_N_PROCESS', 1))
+
+# Initialize the full-text index over page content
+page_search_index = PageSearchIndex()
+
+# Only the top-k sentences of a page by instruction keyword overlap go through spaCy (0 = whole pages)
+app.config['NLP_SENTENCE_TOP_K'] = int(os.environ.get('NLP_SENTENCE_TOP_K', 5))
+
+# Optional JSON file adding typed value patterns (IBAN, VAT id, ...) to the nlp rule library
+app.config['NLP_PATTERN_LIBRARY'] = os.environ.get('NLP_PATTERN_LIBRARY') or None
+
+# Send nlp rules to a shared NLP service process when one is configured
+app.config['NLP_SERVICE_SOCKET'] = os.environ.get('NLP_SERVICE_SOCKET') or None
+
+if app.config['NLP_SERVICE_SOCKET']:
+    nlp_extractor = NLPServiceClient(app.config['NLP_SERVICE_SOCKET'], service_authkey())
+else:
+    nlp_extractor = NLPExtractor(
+        sentence_top_k=app.config['NLP_SENTENCE_TOP_K'],
+        pattern_library=load_pattern_library(app.config['NLP_PATTERN_LIBRARY'])
+    )
 
 # Initialize extractors
-pattern_extractor = PatternExtractor()
+pattern_extractor = PatternExtractor(
+    nlp_batch_size=app.config['NLP_BATCH_SIZE'],
+    nlp_n_process=app.config['NLP_N_PROCESS'],
+    search_index=page_search_index,
+    nlp_extractor=nlp_extractor
+)
+rule_set_store = RuleSetStore(pattern_extractor)
+
+# spaCy and NLTK load on the first nlp rule unless preloaded, e.g. in a gunicorn master with preload_app
+app.config['PRELOAD_NLP'] = os.environ.get('PRELOAD_NLP', '0').lower() in ('1', 'true', 'yes')
+if app.config['PRELOAD_NLP']:
+    pattern_extractor.nlp_extractor.load()
+
+# Configure background ingestion and extraction workers
+app.config['WORKER_POLL_INTERVAL'] = float(os.environ.get('WORKER_POLL_INTERVAL', 1.0))
+# Running jobs send a heartbeat; without one for WORKER_STALE_AFTER seconds they are failed
+app.config['WORKER_HEARTBEAT_INTERVAL'] = float(os.environ.get('WORKER_HEARTBEAT_INTERVAL', 30))
+app.config['WORKER_STALE_AFTER'] = float(os.environ.get('WORKER_STALE_AFTER', 300))
+app.config['EXTRACTION_CHUNK_SIZE'] = int(os.environ.get('EXTRACTION_CHUNK_SIZE', 25))
+app.config['EXTRACTION_WORKERS'] = int(os.environ.get('EXTRACTION_WORKERS', app.config['OCR_WORKERS']))
+app.config['RESULTS_PER_PAGE'] = int(os.environ.get('RESULTS_PER_PAGE', 100))
+app.config['SEARCH_RESULTS_PER_PAGE'] = int(os.environ.get('SEARCH_RESULTS_PER_PAGE', 20))
+app.config['DOCUMENTS_PER_PAGE'] = int(os.environ.get('DOCUMENTS_PER_PAGE', 50))
+
+ingestion_jobs = IngestionJobHandler(document_processor)
+extraction_runs = ExtractionRunHandler(
+    pattern_extractor,
+    chunk_size=app.config['EXTRACTION_CHUNK_SIZE'],
+    workers=app.config['EXTRACTION_WORKERS']
+)
+worker_pool = WorkerPool(
+    app,
+    [ingestion_jobs, extraction_runs],
+    workers=app.config['INGESTION_WORKERS'],
+    poll_interval=app.config['WORKER_POLL_INTERVAL'],
+    heartbeat_interval=app.config['WORKER_HEARTBEAT_INTERVAL'],
+    stale_after=app.config['WORKER_STALE_AFTER']
+)
 
 
 # Helper function to check allowed file extensions
@@ -49,9 +204,77 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def keyset_paginate(query, model, columns, per_page, descending=False):
+    """
+    Return one page of rows using keyset pagination
+    
+    The page is located from the ?after= or ?before= row id instead of an OFFSET,
+    so every page is a range scan on an index over the sort columns.
+    
+    Args:
+        query: Query to paginate
+        model: Model whose ids are used as cursors
+        columns: Sort columns, ending with a unique one such as the id
+        per_page: Number of rows per page
+        descending: Whether rows are listed in descending order
+        
+    Returns:
+        tuple: (rows, prev_cursor, next_cursor) where the cursors are the row ids
+            to pass as ?before= and ?after=, or None at either end
+    """
+    after = request.args.get('after', type=int)
+    before = request.args.get('before', type=int)
+    anchor = db.session.get(model, after or before) if after or before else None
+    backwards = bool(anchor and before)
+    
+    # Walking backwards scans in the opposite direction and flips the page afterwards
+    ascending_scan = backwards == descending
+    
+    if anchor:
+        key = db.tuple_(*columns)
+        anchor_key = db.tuple_(*(getattr(anchor, column.key) for column in columns))
+        query = query.filter(key > anchor_key if ascending_scan else key < anchor_key)
+    
+    query = query.order_by(*(column.asc() if ascending_scan else column.desc() for column in columns))
+    
+    # Fetch one extra row to find out whether another page follows
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    if backwards:
+        rows.reverse()
+        has_prev, has_next = has_more, True
+    else:
+        has_prev, has_next = bool(anchor), has_more
+    
+    prev_cursor = rows[0].id if rows and has_prev else None
+    next_cursor = rows[-1].id if rows and has_next else None
+    
+    return rows, prev_cursor, next_cursor
+
+
+def paginate_documents():
+    """
+    Return one page of fully processed documents, newest first
+    
+    Returns:
+        tuple: (documents, newer_cursor, older_cursor)
+    """
+    # Documents still being ingested have no page count yet
+    return keyset_paginate(
+        Document.query.filter(Document.page_count > 0),
+        Document,
+        [Document.created_at, Document.id],
+        app.config['DOCUMENTS_PER_PAGE'],
+        descending=True
+    )
+
+
 # Create database tables
 with app.app_context():
     db.create_all()
+    page_search_index.ensure_schema()
 
 
 # Routes
@@ -63,14 +286,17 @@ def index():
 
 @app.route('/documents')
 def list_documents():
-    """List all processed documents"""
-    documents = Document.query.order_by(Document.created_at.desc()).all()
-    return render_template('documents.html', documents=documents)
+    """List processed documents, one page at a time"""
+    documents, newer_cursor, older_cursor = paginate_documents()
+    return render_template('documents.html',
+                          documents=documents,
+                          newer_cursor=newer_cursor,
+                          older_cursor=older_cursor)
 
 
 @app.route('/documents', methods=['POST'])
 def upload_document():
-    """Handle document upload and processing"""
+    """Handle document upload and queue it for processing"""
     if 'document' not in request.files:
         flash('No document part', 'danger')
         return redirect(request.url)
@@ -83,131 +309,290 @@ def upload_document():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # Copy the upload to disk in blocks, hashing it on the way for deduplication
+        file_path, content_hash = upload_store.save(filename, file.stream)
         
-        try:
-            document_id, page_count = document_processor.process(file_path, filename)
-            flash(f'Document uploaded and processed successfully. {page_count} pages extracted.', 'success')
-            return redirect(url_for('view_document', doc_id=document_id))
-        except Exception as e:
-            flash(f'Error processing document: {str(e)}', 'danger')
-            return redirect(url_for('list_documents'))
+        # Extraction runs in the worker pool so upload latency doesn't depend on document size
+        # "Reprocess" extracts the file again even if an identical one was processed before
+        job = ingestion_jobs.enqueue(
+            file_path,
+            filename,
+            content_hash=content_hash,
+            force='reprocess' in request.form
+        )
+        
+        flash('Document uploaded and queued for processing.', 'info')
+        return redirect(url_for('view_job', job_id=job.id))
     else:
         flash('File type not allowed. Please upload PDF, DOCX, or image files.', 'warning')
         return redirect(request.url)
 
 
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """Start a chunked upload; the file is then sent with PUT requests"""
+    data = request.get_json(silent=True) or request.form
+    filename = data.get('filename', '')
+    
+    try:
+        total_size = int(data.get('size', 0) or 0)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid file size'}), 400
+    
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': 'File type not allowed. Please upload PDF, DOCX, or image files.'}), 400
+    
+    if total_size <= 0 or total_size > app.config['MAX_UPLOAD_SIZE']:
+        return jsonify({'error': 'Invalid file size'}), 400
+    
+    # Uploads abandoned by their clients would otherwise keep their partial files forever
+    upload_store.delete_expired(app.config['UPLOAD_EXPIRY'])
+    
+    upload = upload_store.create(filename, total_size)
+    
+    return jsonify(dict(
+        upload.to_dict(),
+        chunk_size=app.config['UPLOAD_CHUNK_SIZE'],
+        upload_url=url_for('upload_chunk', upload_id=upload.id)
+    )), 201
+
+
+@app.route('/uploads/<upload_id>')
+def upload_state(upload_id):
+    """Return how much of a chunked upload has been received, so clients can resume"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    return jsonify(upload.to_dict())
+
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append the request body to a chunked upload at the given offset"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    if upload.status != 'uploading':
+        return jsonify(dict(upload.to_dict(), error='Upload already completed')), 409
+    
+    try:
+        upload_store.append(upload, request.args.get('offset', 0, type=int), request.stream)
+    except UploadOffsetError as e:
+        return jsonify({'error': str(e), 'received_bytes': e.received_bytes}), 409
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(upload.to_dict())
+
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    """Finish a chunked upload and queue the file for processing"""
+    upload = UploadSession.query.get_or_404(upload_id)
+    
+    if upload.status == 'uploading':
+        try:
+            content_hash = upload_store.finish(upload)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'received_bytes': upload.received_bytes}), 409
+        
+        data = request.get_json(silent=True) or request.form
+        job = ingestion_jobs.enqueue(
+            upload.file_path,
+            upload.filename,
+            content_hash=content_hash,
+            force=bool(data.get('reprocess'))
+        )
+        upload.job_id = job.id
+        db.session.commit()
+    
+    return jsonify(dict(upload.to_dict(), job_url=url_for('view_job', job_id=upload.job_id)))
+
+
+@app.route('/jobs/<int:job_id>')
+def view_job(job_id):
+    """Show the progress of an ingestion job"""
+    job = IngestionJob.query.get_or_404(job_id)
+    return render_template('job.html', job=job)
+
+
+@app.route('/jobs/<int:job_id>/status')
+def job_status(job_id):
+    """Return the status and page progress of an ingestion job as JSON"""
+    job = IngestionJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Return upload deduplication hit/miss counters as JSON"""
+    counts = dict(
+        db.session.query(IngestionJob.cache_hit, db.func.count(IngestionJob.id))
+        .filter(IngestionJob.cache_hit.isnot(None))
+        .group_by(IngestionJob.cache_hit)
+        .all()
+    )
+    hits = counts.get(True, 0)
+    misses = counts.get(False, 0)
+    
+    return jsonify({
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+    })
+
+
+@app.route('/search')
+def search():
+    """Search page content across all documents"""
+    query = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = app.config['SEARCH_RESULTS_PER_PAGE']
+    
+    hits, total = page_search_index.search(query, page=page, per_page=per_page) if query else ([], 0)
+    
+    return render_template('search.html',
+                          query=query,
+                          hits=hits,
+                          total=total,
+                          page=page,
+                          pages=(total + per_page - 1) // per_page)
+
+
 @app.route('/extract')
 def extract_data():
     """Handle extraction request"""
-    documents = Document.query.order_by(Document.created_at.desc()).all()
-    return render_template('extract.html', documents=documents)
+    documents, newer_cursor, older_cursor = paginate_documents()
+    return render_template('extract.html',
+                          documents=documents,
+                          rule_sets=rule_set_store.recent(),
+                          newer_cursor=newer_cursor,
+                          older_cursor=older_cursor)
 
 
 @app.route('/results', methods=['POST'])
 def show_results():
-    """Show extraction results"""
+    """Start an extraction run and redirect to its results"""
     if 'document_ids' not in request.form:
         flash('No documents selected', 'warning')
         return redirect(url_for('extract_data'))
     
-    if 'excel_file' not in request.files:
-        flash('No Excel file uploaded', 'warning')
-        return redirect(url_for('extract_data'))
+    rule_set_id = request.form.get('rule_set_id', type=int)
+    excel_file = request.files.get('excel_file')
+    
+    if excel_file and excel_file.filename:
+        # Save Excel file temporarily
+        excel_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(excel_file.filename))
+        excel_file.save(excel_path)
+        
+        # Reuse the stored rule set if this exact sheet was uploaded before
+        try:
+            rule_set = rule_set_store.get_or_create(excel_path, secure_filename(excel_file.filename))
+        finally:
+            os.remove(excel_path)
+        
+        if not rule_set:
+            flash('No valid extraction rules found in Excel file', 'warning')
+            return redirect(url_for('extract_data'))
     
-    excel_file = request.files['excel_file']
+    elif rule_set_id:
+        rule_set = db.session.get(RuleSet, rule_set_id)
+        
+        if not rule_set:
+            flash('Saved rule set not found', 'warning')
+            return redirect(url_for('extract_data'))
     
-    if excel_file.filename == '':
-        flash('No selected Excel file', 'warning')
+    else:
+        flash('Upload an Excel file or choose a saved rule set', 'warning')
         return redirect(url_for('extract_data'))
     
-    # Save Excel file temporarily
-    excel_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(excel_file.filename))
-    excel_file.save(excel_path)
+    # Only fully processed documents can be extracted
+    document_ids = [
+        document_id for (document_id,) in db.session.query(Document.id).filter(
+            Document.id.in_(request.form.getlist('document_ids', type=int)),
+            Document.page_count > 0
+        ).order_by(Document.id)
+    ]
+    if not document_ids:
+        flash('The selected documents are still being processed', 'warning')
+        return redirect(url_for('extract_data'))
     
-    # Load extraction rules from Excel
-    rules = pattern_extractor.load_rules_from_excel(excel_path)
+    # Queue the extraction; the worker pool processes the documents in chunks
+    run = extraction_runs.enqueue(document_ids, rule_set, incremental='incremental' in request.form)
     
-    if not rules:
-        flash('No valid extraction rules found in Excel file', 'warning')
-        return redirect(url_for('extract_data'))
+    return redirect(url_for('view_run', run_id=run.id))
+
+
+@app.route('/runs/<int:run_id>')
+def view_run(run_id):
+    """Show the progress and a page of results of an extraction run"""
+    run = ExtractionRun.query.get_or_404(run_id)
     
-    # Save rules to database
-    saved_rules = []
-    for rule in rules:
-        db_rule = ExtractionRule(
-            name=rule.get('field_name', 'Unnamed Field'),
-            pattern=rule.get('search_pattern', ''),
-            extraction_type=rule.get('extraction_type', 'exact'),
-            context=rule.get('context_before', '') + ' | ' + rule.get('context_after', ''),
-            instructions=rule.get('instructions', '')
-        )
-        db.session.add(db_rule)
-        saved_rules.append(db_rule)
-    
-    db.session.commit()
-    
-    # Extract data from selected documents
-    document_ids = request.form.getlist('document_ids')
-    results = []
-    
-    for doc_id in document_ids:
-        document = Document.query.get(doc_id)
-        if document:
-            # Create document object for the extractor
-            doc_data = {
-                'id': document.id,
-                'filename': document.filename,
-                'file_type': document.file_type,
-                'pages': {}
-            }
-            
-            # Add page content
-            for page in document.pages:
-                doc_data['pages'][page.page_number] = page.content
-            
-            # Extract data using rules
-            extraction_results = pattern_extractor.extract_from_document(doc_data, rules)
-            
-            # Save results to database
-            for result in extraction_results:
-                rule_index = result.get('rule_index', 0)
-                if rule_index < len(saved_rules):
-                    db_result = ExtractionResult(
-                        document_id=document.id,
-                        rule_id=saved_rules[rule_index].id,
-                        page_number=result.get('page_number', 1),
-                        value=result.get('value', ''),
-                        context=result.get('context', '')
-                    )
-                    db.session.add(db_result)
-                    results.append(db_result)
-    
-    db.session.commit()
-    
-    # Get all results with related data
-    all_results = ExtractionResult.query.filter(
-        ExtractionResult.id.in_([r.id for r in results])
-    ).order_by(
-        ExtractionResult.document_id,
-        ExtractionResult.page_number
-    ).all()
-    
-    return render_template('results.html', 
-                          results=all_results, 
-                          rules=saved_rules,
-                          document_count=len(set(r.document_id for r in results)))
+    # Load each row's document name and rule in the same query instead of one SELECT per row
+    query = ExtractionResult.query.filter_by(run_id=run.id).options(
+        joinedload(ExtractionResult.document).load_only(Document.filename),
+        joinedload(ExtractionResult.rule).load_only(ExtractionRule.name, ExtractionRule.extraction_type)
+    )
+    results, prev_cursor, next_cursor = keyset_paginate(
+        query,
+        ExtractionResult,
+        [ExtractionResult.document_id, ExtractionResult.page_number, ExtractionResult.id],
+        app.config['RESULTS_PER_PAGE']
+    )
+    
+    # Stream the page so the browser can start rendering rows before the table is complete
+    return stream_template('results.html',
+                          run=run,
+                          results=results,
+                          prev_cursor=prev_cursor,
+                          next_cursor=next_cursor,
+                          rules=run.rules,
+                          document_count=run.total_documents)
+
+
+@app.route('/runs/<int:run_id>/export.<fmt>')
+def export_run(run_id, fmt):
+    """Stream all results of an extraction run as CSV, JSONL or XLSX"""
+    run = ExtractionRun.query.get_or_404(run_id)
+    
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    
+    encode, mimetype = EXPORT_FORMATS[fmt]
+    
+    # Rows are read from the cursor and encoded as the response is sent
+    return Response(
+        stream_with_context(encode(iter_run_rows(run.id))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=extraction_run_{run.id}.{fmt}'}
+    )
+
+
+@app.route('/runs/<int:run_id>/status')
+def run_status(run_id):
+    """Return the status and progress of an extraction run as JSON"""
+    run = ExtractionRun.query.get_or_404(run_id)
+    return jsonify(run.to_dict())
 
 
 @app.route('/documents/<int:doc_id>')
 def view_document(doc_id):
     """View a specific document"""
     document = Document.query.get_or_404(doc_id)
+    # Page text is deferred; the template fetches it from view_page when a page is opened
     pages = Page.query.filter_by(document_id=doc_id).order_by(Page.page_number).all()
     return render_template('document.html', document=document, pages=pages)
 
 
+@app.route('/documents/<int:doc_id>/pages/<int:page_number>')
+def view_page(doc_id, page_number):
+    """Return the text of one page as JSON"""
+    page = Page.query.filter_by(document_id=doc_id, page_number=page_number).first_or_404()
+    return jsonify({
+        'document_id': page.document_id,
+        'page_number': page.page_number,
+        'content': page.content or ''
+    })
+
+
 @app.route('/documents/<int:doc_id>/delete', methods=['POST'])
 def delete_document(doc_id):
     """Delete a document"""
@@ -0,0 +1,193 @@
+"""
+Compare plain tesseract OCR with the preprocessing / adaptive DPI pipeline.
+
+Scans are taken from --samples (page images with a .txt file of the expected
+text next to each, e.g. scan1.png + scan1.txt) or, without it, generated:
+synthetic 300 DPI pages of text with some noise, plus a few blank pages, half
+of them with the gray paper noise of a real scan, and pages with a single short
+line that must not be taken for blank ones.
+
+The baseline OCRs every page at full resolution with image_to_string, the way
+pages were OCRed before the pipeline. The pipeline sees each page at OCR_DPI
+first and only gets the 300 DPI image back when its confidence is low,
+mimicking the re-render of a PDF page. Reports pages/sec and character
+accuracy (1 - character error rate).
+
+Usage:
+    python benchmarks/bench_ocr.py [--samples DIR] [--pages N] [--profile document]
+"""
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.ocr_pipeline import OCRPipeline  # noqa: E402
+
+SCAN_DPI = 300
+
+WORDS = (
+    'invoice total amount due payment account customer service agreement period '
+    'balance reference order delivery tax rate contract party date signature '
+    'schedule terms conditions quantity description unit price subtotal'
+).split()
+
+
+def synthetic_pages(count, seed=11):
+    """Return (image, expected_text) pairs of generated letter-size pages at 300 DPI"""
+    rng = random.Random(seed)
+    try:
+        font = ImageFont.load_default(size=34)
+    except TypeError:
+        # Pillow < 10.1 only has the small bitmap font
+        font = ImageFont.load_default()
+    
+    pages = []
+    for index in range(count):
+        image = Image.new('RGB', (int(8.5 * SCAN_DPI), 11 * SCAN_DPI), 'white')
+        
+        # Every fifth page is blank, like the back of a duplex scan; every other
+        # one is noisy off-white paper rather than pure white
+        if index % 5 == 4:
+            if index % 10 == 9:
+                noise = Image.effect_noise(image.size, 40)
+                image = noise.point(lambda value: 225 + value * 30 // 255).convert('RGB')
+            pages.append((image, ''))
+            continue
+        
+        draw = ImageDraw.Draw(image)
+        
+        # Some pages hold one short line, e.g. a date below a signature
+        if index % 10 == 3:
+            line = f"Date {rng.randint(1, 28)}.{rng.randint(1, 12)}.2024"
+            draw.text((150, 1500), line, fill=(30, 30, 30), font=font)
+            pages.append((image, line))
+            continue
+        
+        lines = []
+        for line_number in range(40):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(5, 9))]
+            words.append(f"{rng.randint(100, 99999)}.{rng.randint(0, 99):02d}")
+            line = ' '.join(words)
+            lines.append(line)
+            draw.text((150, 150 + line_number * 70), line, fill=(30, 30, 30), font=font)
+        
+        # Scanner noise: scattered specks
+        for _ in range(3000):
+            x, y = rng.randrange(image.width), rng.randrange(image.height)
+            draw.point((x, y), fill=(rng.randint(120, 200),) * 3)
+        
+        pages.append((image, '\n'.join(lines)))
+    
+    return pages
+
+
+def sample_pages(directory):
+    """Return (image, expected_text) pairs for the images in a directory that have a .txt file"""
+    pages = []
+    for image_path in sorted(glob.glob(os.path.join(directory, '*'))):
+        base, extension = os.path.splitext(image_path)
+        if extension.lower() not in ('.png', '.jpg', '.jpeg', '.tif', '.tiff') or not os.path.exists(base + '.txt'):
+            continue
+        with open(base + '.txt', encoding='utf-8') as f:
+            expected = f.read()
+        with Image.open(image_path) as image:
+            pages.append((image.copy(), expected))
+    return pages
+
+
+def character_accuracy(expected, actual):
+    """Return 1 - (edit distance / expected length), ignoring whitespace differences"""
+    expected = ' '.join(expected.split())
+    actual = ' '.join(actual.split())
+    if not expected:
+        return 1.0 if not actual else 0.0
+    
+    previous = list(range(len(actual) + 1))
+    for i, expected_char in enumerate(expected, 1):
+        current = [i]
+        for j, actual_char in enumerate(actual, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (expected_char != actual_char)
+            ))
+        previous = current
+    
+    return max(0.0, 1 - previous[-1] / len(expected))
+
+
+def run_baseline(pages):
+    """OCR every page at full resolution without preprocessing"""
+    start = time.perf_counter()
+    texts = [pytesseract.image_to_string(image) for image, _ in pages]
+    return time.perf_counter() - start, texts, {}
+
+
+def run_pipeline(pages, pipeline, first_dpi):
+    """OCR every page through the pipeline, starting from a first_dpi rendition"""
+    scale = first_dpi / SCAN_DPI
+    first_pass = [
+        image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+        for image, _ in pages
+    ]
+    
+    start = time.perf_counter()
+    results = [
+        pipeline.ocr_image(low_res, rerender=lambda image=image: image)
+        for low_res, (image, _) in zip(first_pass, pages)
+    ]
+    elapsed = time.perf_counter() - start
+    
+    stats = {
+        'blank': sum(1 for result in results if result['blank']),
+        'retried': sum(1 for result in results if result['retried'])
+    }
+    return elapsed, [result['text'] for result in results], stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--samples', help='directory of page images with .txt ground truth')
+    parser.add_argument('--pages', type=int, default=10, help='number of synthetic pages')
+    parser.add_argument('--profile', default='document', help='OCR profile used by the pipeline')
+    parser.add_argument('--dpi', type=int, default=200, help='resolution of the first OCR pass')
+    parser.add_argument('--min-confidence', type=float, default=70, help='retry below this confidence')
+    args = parser.parse_args()
+    
+    pages = sample_pages(args.samples) if args.samples else synthetic_pages(args.pages)
+    if not pages:
+        sys.exit('No sample pages found')
+    
+    pipeline = OCRPipeline.from_profile(args.profile, min_confidence=args.min_confidence, retry_dpi=SCAN_DPI)
+    
+    scenarios = [
+        ('baseline 300dpi', run_baseline(pages)),
+        (f'pipeline {args.dpi}dpi', run_pipeline(pages, pipeline, args.dpi))
+    ]
+    
+    print(f"{len(pages)} pages, {sum(1 for _, expected in pages if not expected.strip())} of them blank, "
+          f"profile '{args.profile}' ({pipeline.tesseract_config})")
+    print(f"{'scenario':<18} {'seconds':>8} {'pages/s':>8} {'char acc':>9} {'blank':>6} {'retried':>8}")
+    
+    for name, (elapsed, texts, stats) in scenarios:
+        accuracies = [
+            character_accuracy(expected, text)
+            for (_, expected), text in zip(pages, texts)
+            if expected
+        ]
+        accuracy = sum(accuracies) / len(accuracies) if accuracies else 1.0
+        print(
+            f"{name:<18} {elapsed:>8.2f} {len(pages) / elapsed:>8.2f} {accuracy:>8.1%} "
+            f"{stats.get('blank', '-'):>6} {stats.get('retried', '-'):>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
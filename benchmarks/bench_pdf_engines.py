@@ -0,0 +1,180 @@
+"""
+Compare the PDF text engines on the same corpus.
+
+Each engine runs in a fresh interpreter that opens every PDF the way
+PDFProcessor does (a PyPDF2 reader plus the engine) and reads the text layer
+of every page. Reports pages/sec, characters extracted and peak resident
+memory; the 'open only' row is the cost of the PyPDF2 reader alone, which
+every engine pays.
+
+The corpus is every PDF in --corpus or, without it, generated born-digital
+PDFs with --pages pages each.
+
+Usage:
+    python benchmarks/bench_pdf_engines.py [--corpus DIR] [--documents N] [--pages N]
+"""
+import os
+import sys
+import glob
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from processors.pdf_text_engines import PDF_TEXT_ENGINES  # noqa: E402
+
+# Runs inside the child interpreter and prints one JSON line
+CHILD_SCRIPT = """
+import sys, json, time, resource
+import PyPDF2
+from processors.pdf_text_engines import PDF_TEXT_ENGINES
+
+engine_name, paths = sys.argv[1], sys.argv[2:]
+engine_class = PDF_TEXT_ENGINES.get(engine_name)
+pages = characters = 0
+
+start = time.perf_counter()
+for path in paths:
+    with open(path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        total_pages = len(reader.pages)
+        if engine_class is None:
+            pages += total_pages
+            continue
+        engine = engine_class(path, reader)
+        try:
+            for page_num in range(total_pages):
+                characters += len(engine.page_text(page_num) or '')
+                pages += 1
+        finally:
+            engine.close()
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    'seconds': elapsed,
+    'pages': pages,
+    'characters': characters,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+WORDS = (
+    'agreement party shall payment invoice schedule delivery term notice clause '
+    'obligation liability warranty service period amount total date section'
+).split()
+
+
+def write_text_pdf(path, page_texts):
+    """Write a minimal PDF with one Helvetica text page per entry of page_texts"""
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # Page tree, filled in once the page objects are numbered
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>'
+    ]
+    page_ids = []
+    
+    for lines in page_texts:
+        commands = ['BT', '/F1 10 Tf', '12 TL', '50 750 Td']
+        for line in lines:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            commands.append(f'({escaped}) Tj T*')
+        commands.append('ET')
+        stream = '\n'.join(commands).encode('latin-1')
+        
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        page_ids.append(len(objects))
+    
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids).encode('ascii')
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, len(page_ids))
+    
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    
+    xref_offset = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        output += b'%010d 00000 n \n' % offset
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset)
+    
+    with open(path, 'wb') as f:
+        f.write(output)
+
+
+def synthetic_corpus(directory, documents, pages, seed=5):
+    """Generate born-digital PDFs and return their paths"""
+    rng = random.Random(seed)
+    paths = []
+    for index in range(documents):
+        page_texts = [
+            [' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(55)]
+            for _ in range(pages)
+        ]
+        path = os.path.join(directory, f'document{index + 1}.pdf')
+        write_text_pdf(path, page_texts)
+        paths.append(path)
+    return paths
+
+
+def run_child(engine_name, paths):
+    """Extract the corpus with one engine in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT, engine_name] + paths,
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory of PDF files')
+    parser.add_argument('--documents', type=int, default=5, help='number of synthetic PDFs')
+    parser.add_argument('--pages', type=int, default=100, help='pages per synthetic PDF')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix='bench_pdf_') as directory:
+        if args.corpus:
+            paths = sorted(glob.glob(os.path.join(args.corpus, '*.pdf')))
+        else:
+            paths = synthetic_corpus(directory, args.documents, args.pages)
+        
+        if not paths:
+            sys.exit('No PDF files found')
+        
+        print(f"{len(paths)} PDF files")
+        print(f"{'engine':<12} {'seconds':>8} {'pages/s':>9} {'characters':>11} {'max RSS':>9}")
+        
+        for engine_name in ['open only'] + list(PDF_TEXT_ENGINES):
+            engine = PDF_TEXT_ENGINES.get(engine_name)
+            if engine is not None and not engine.available():
+                print(f"{engine_name:<12} not installed")
+                continue
+            
+            try:
+                result = run_child(engine_name, paths)
+            except subprocess.CalledProcessError as e:
+                print(f"{engine_name:<12} failed: {e.stderr.strip().splitlines()[-1] if e.stderr else e}")
+                continue
+            
+            print(
+                f"{engine_name:<12} {result['seconds']:>8.2f} {result['pages'] / max(result['seconds'], 1e-9):>9.1f} "
+                f"{result['characters']:>11} {result['max_rss_mb']:>7.0f}MB"
+            )
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Compare nlp rule extraction with and without the sentence prefilter.
+
+Builds synthetic invoice-like pages (a few informative sentences buried in
+filler text), runs the same instructions through NLPExtractor with whole-page
+parsing (sentence_top_k=0) and with the prefilter, and reports throughput and
+how often the prefiltered value matches the whole-page value.
+
+Usage:
+    python benchmarks/bench_sentence_prefilter.py [--pages N] [--top-k K]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors.nlp_extractor import NLPExtractor  # noqa: E402
+
+INSTRUCTIONS = [
+    'Find the invoice total amount',
+    'Extract the payment due date',
+    'Find the name of the customer company',
+    'Extract the invoice reference number',
+]
+
+FACTS = [
+    'The invoice total is ${amount} including tax.',
+    'Payment is due on {date}.',
+    'This invoice was issued to {company} for consulting services.',
+    'Please quote invoice reference {reference} with your payment.',
+]
+
+FILLER = [
+    'Our team appreciates the opportunity to work with you this quarter.',
+    'All services were delivered according to the agreed statement of work.',
+    'Questions about this document can be sent to the accounts department.',
+    'We value long-term partnerships and look forward to future projects.',
+    'Deliverables were reviewed and accepted by the project stakeholders.',
+    'The next review meeting will be scheduled by the account manager.',
+    'Shipping and handling are not applicable to professional services.',
+    'Thank you for choosing our firm for your advisory needs.',
+]
+
+COMPANIES = ['Globex Corporation', 'Initech LLC', 'Umbrella Holdings', 'Stark Industries', 'Wayne Enterprises']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August']
+
+
+def build_pages(count, filler_sentences, seed=7):
+    """Return synthetic page texts with the facts scattered through filler"""
+    rng = random.Random(seed)
+    pages = []
+    
+    for _ in range(count):
+        sentences = [rng.choice(FILLER) for _ in range(filler_sentences)]
+        facts = [
+            fact.format(
+                amount=f"{rng.randint(100, 99999):,}.{rng.randint(0, 99):02d}",
+                date=f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, 2025",
+                company=rng.choice(COMPANIES),
+                reference=f"INV-{rng.randint(1000, 9999)}-{rng.choice('ABCDEFGH')}{rng.randint(10, 99)}"
+            )
+            for fact in FACTS
+        ]
+        for fact in facts:
+            sentences.insert(rng.randint(0, len(sentences)), fact)
+        pages.append(' '.join(sentences))
+    
+    return pages
+
+
+def run(extractor, items, batch_size):
+    """Extract all items with a cold cache and return (seconds, results)"""
+    extractor.clear_caches()
+    start = time.perf_counter()
+    results = extractor.extract_many(items, batch_size=batch_size)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200, help='number of synthetic pages')
+    parser.add_argument('--filler', type=int, default=40, help='filler sentences per page')
+    parser.add_argument('--top-k', type=int, default=5, help='candidate sentences parsed per page')
+    parser.add_argument('--batch-size', type=int, default=64, help='nlp.pipe batch size')
+    args = parser.parse_args()
+    
+    pages = build_pages(args.pages, args.filler)
+    items = [(page, instructions) for page in pages for instructions in INSTRUCTIONS]
+    
+    baseline = NLPExtractor(sentence_top_k=0, doc_cache_size=args.pages)
+    prefiltered = NLPExtractor(sentence_top_k=args.top_k, doc_cache_size=args.pages)
+    baseline.load()
+    prefiltered.load()
+    
+    if not baseline.nlp:
+        sys.exit('spaCy model en_core_web_sm is not available')
+    
+    # Warm up the pipelines so model loading isn't timed
+    run(baseline, items[:len(INSTRUCTIONS)], args.batch_size)
+    run(prefiltered, items[:len(INSTRUCTIONS)], args.batch_size)
+    
+    baseline_s, baseline_results = run(baseline, items, args.batch_size)
+    prefiltered_s, prefiltered_results = run(prefiltered, items, args.batch_size)
+    
+    print(f"{len(pages)} pages x {len(INSTRUCTIONS)} instructions, "
+          f"{args.filler} filler sentences per page, top-k={args.top_k}")
+    print(f"{'mode':<14} {'seconds':>9} {'items/s':>9}")
+    print(f"{'whole page':<14} {baseline_s:>9.2f} {len(items) / baseline_s:>9.1f}")
+    print(f"{'prefilter':<14} {prefiltered_s:>9.2f} {len(items) / prefiltered_s:>9.1f}")
+    print(f"speedup: {baseline_s / prefiltered_s:.1f}x")
+    
+    print()
+    print(f"{'instruction':<40} {'same value':>10}")
+    for index, instructions in enumerate(INSTRUCTIONS):
+        pairs = list(zip(baseline_results[index::len(INSTRUCTIONS)], prefiltered_results[index::len(INSTRUCTIONS)]))
+        same = sum(1 for expected, actual in pairs if expected.get('value') == actual.get('value'))
+        print(f"{instructions:<40} {same / len(pairs):>9.1%}")
+    
+    overall = sum(1 for expected, actual in zip(baseline_results, prefiltered_results)
+                  if expected.get('value') == actual.get('value'))
+    print(f"{'overall agreement':<40} {overall / len(items):>9.1%}")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Benchmark worker boot time and memory with lazy and preloaded NLP models.
+
+Each scenario runs in a fresh interpreter, the way a gunicorn worker starts,
+and reports how long importing the app takes, how long the first nlp
+extraction takes, and the peak resident memory of the process.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat N]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter and prints one JSON line
+CHILD_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.pattern_extractor.nlp_extractor.extract_from_text(
+    'The invoice total is $1,250.00, due on March 3, 2025.',
+    'Find the total amount'
+)
+first_nlp = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - start,
+    'first_nlp_s': first_nlp - imported,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+SCENARIOS = [
+    ('lazy (default)', {'PRELOAD_NLP': '0'}),
+    ('preload NLP', {'PRELOAD_NLP': '1'}),
+]
+
+
+def run_child(env_overrides):
+    """Start a fresh interpreter, import the app and return its measurements"""
+    # Importing the app must not start workers that would claim real jobs
+    env = dict(os.environ, WORKER_AUTOSTART='0', **env_overrides)
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=PROJECT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario (median is reported)')
+    args = parser.parse_args()
+    
+    print(f"{'scenario':<16} {'app import':>11} {'first nlp':>11} {'boot total':>11} {'max RSS':>10}")
+    
+    for name, env_overrides in SCENARIOS:
+        runs = [run_child(env_overrides) for _ in range(args.repeat)]
+        import_s = statistics.median(run['import_s'] for run in runs)
+        first_nlp_s = statistics.median(run['first_nlp_s'] for run in runs)
+        max_rss_mb = statistics.median(run['max_rss_mb'] for run in runs)
+        
+        print(
+            f"{name:<16} {import_s:>10.2f}s {first_nlp_s:>10.2f}s "
+            f"{import_s + first_nlp_s:>10.2f}s {max_rss_mb:>8.0f}MB"
+        )
+    
+    print()
+    print("'app import' is what every worker pays at boot without preload_app.")
+    print("With gunicorn preload_app=True and PRELOAD_NLP=1 the master pays it once and")
+    print("forked workers start with the model already in shared memory.")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
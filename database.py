@@ -1,5 +1,7 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -7,4 +9,14 @@ class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
\ No newline at end of file
+db = SQLAlchemy(model_class=Base)
+
+
+def insert_ignoring_conflicts(model):
+    """Return an INSERT for the model that skips rows violating a unique constraint"""
+    dialect_insert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(db.engine.dialect.name)
+    
+    if dialect_insert is None:
+        return insert(model)
+    
+    return dialect_insert(model).on_conflict_do_nothing()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import io
+import os
+import csv
+import json
+import tempfile
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+from database import db
+from models import Document, ExtractionRule, ExtractionResult
+
+
+# Columns written by every export format
+EXPORT_COLUMNS = ['document', 'page', 'field', 'value', 'context', 'method']
+
+# Spreadsheet programs evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_run_rows(run_id, batch_size=1000):
+    """
+    Yield the results of an extraction run as plain tuples
+    
+    Rows are fetched with yield_per, so the driver cursor is read in batches
+    instead of loading the whole run into memory.
+    
+    Args:
+        run_id: ID of the extraction run
+        batch_size: Number of rows fetched from the cursor at a time
+        
+    Yields:
+        tuple: Values in EXPORT_COLUMNS order
+    """
+    statement = (
+        db.select(
+            Document.filename,
+            ExtractionResult.page_number,
+            ExtractionRule.name,
+            ExtractionResult.value,
+            ExtractionResult.context,
+            ExtractionRule.extraction_type
+        )
+        .join(Document, Document.id == ExtractionResult.document_id)
+        .join(ExtractionRule, ExtractionRule.id == ExtractionResult.rule_id)
+        .where(ExtractionResult.run_id == run_id)
+        .order_by(ExtractionResult.document_id, ExtractionResult.page_number, ExtractionResult.id)
+        .execution_options(yield_per=batch_size)
+    )
+    
+    for row in db.session.execute(statement):
+        yield tuple(row)
+
+
+def iter_csv(rows, batch_size=1000):
+    """
+    Encode rows as CSV, yielding a chunk of text every batch_size rows
+    
+    Args:
+        rows: Iterable of tuples in EXPORT_COLUMNS order
+        batch_size: Number of rows written per yielded chunk
+        
+    Yields:
+        str: CSV text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_escape_formula(value) for value in row])
+        if count % batch_size == 0:
+            yield _drain(buffer)
+    
+    yield _drain(buffer)
+
+
+def iter_jsonl(rows, batch_size=1000):
+    """
+    Encode rows as JSON Lines, yielding a chunk of text every batch_size rows
+    
+    Args:
+        rows: Iterable of tuples in EXPORT_COLUMNS order
+        batch_size: Number of rows written per yielded chunk
+        
+    Yields:
+        str: JSONL text
+    """
+    lines = []
+    
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def iter_xlsx(rows, read_size=64 * 1024):
+    """
+    Encode rows as an XLSX workbook and yield its bytes
+    
+    XLSX is a zip archive whose directory is written last, so the workbook is
+    built in a temporary file with openpyxl's write-only mode (rows are flushed
+    to disk as they are appended) and then streamed from there.
+    
+    Args:
+        rows: Iterable of tuples in EXPORT_COLUMNS order
+        read_size: Number of bytes yielded at a time
+        
+    Yields:
+        bytes: Workbook content
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Results')
+    sheet.append(EXPORT_COLUMNS)
+    
+    for row in rows:
+        sheet.append([_xlsx_cell(sheet, value) for value in row])
+    
+    handle, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(handle)
+    
+    try:
+        workbook.save(path)
+        with open(path, 'rb') as file:
+            yield from iter(lambda: file.read(read_size), b'')
+    finally:
+        os.remove(path)
+
+
+def _escape_formula(value):
+    """Prefix text a spreadsheet would evaluate as a formula with a quote"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _xlsx_cell(sheet, value):
+    """
+    Build a write-only cell that always stores text as a string
+    
+    openpyxl turns text starting with '=' into a formula, so extracted values
+    like '= 5 + x' would corrupt the workbook or run as live formulas.
+    """
+    if not isinstance(value, str):
+        return value
+    
+    # OCR text can contain control characters that aren't allowed in XLSX cells
+    cell = WriteOnlyCell(sheet, value=ILLEGAL_CHARACTERS_RE.sub('', value))
+    cell.data_type = 's'
+    return cell
+
+
+def _drain(buffer):
+    """Return the text written to a StringIO buffer and empty it"""
+    text = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return text
\ No newline at end of file
@@ -1,28 +1,262 @@
 import re
-import spacy
-import nltk
-from nltk.tokenize import sent_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import json
+import heapq
+import hashlib
+import threading
+from collections import OrderedDict, Counter
+
+
+# Instruction keywords mapped to the spaCy entity labels they ask for
+ENTITY_TYPE_MAPPING = {
+    'date': ['DATE', 'TIME'],
+    'time': ['TIME', 'DATE'],
+    'money': ['MONEY', 'CARDINAL'],
+    'amount': ['MONEY', 'QUANTITY', 'CARDINAL'],
+    'percentage': ['PERCENT'],
+    'number': ['CARDINAL', 'ORDINAL', 'QUANTITY'],
+    'person': ['PERSON'],
+    'name': ['PERSON', 'ORG'],
+    'organization': ['ORG'],
+    'company': ['ORG'],
+    'location': ['LOC', 'GPE'],
+    'address': ['LOC', 'GPE'],
+    'city': ['GPE'],
+    'country': ['GPE']
+}
+
+# Page texts only need entities and sentence boundaries (parser), not POS tags or lemmas
+PAGE_DISABLED_PIPES = ('tagger', 'attribute_ruler', 'lemmatizer')
+
+# Cheap sentence boundaries for the prefilter: end punctuation followed by a capitalized
+# or numeric start, or a blank line
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'(?<=[.!?])\s+(?=["\'(\[]?[A-Z0-9])|\n\s*\n')
+
+# Word tokens used by the sentence prefilter's inverted index
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+MONTH_NAMES = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
+
+# Typed values looked for in the relevant sentences, in priority order: the first family
+# that matches in any sentence wins. A family is active when one of its keywords occurs in
+# the instructions as a whole word. The date, amount and id families are the original
+# ones and keep their priority and substring keyword matching; the more specific formats
+# after them only win when none of those matches.
+PATTERN_LIBRARY = [
+    {
+        'name': 'date',
+        'keywords': ['date', 'when', 'time'],
+        'pattern': (
+            r'\b(?:\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4}|' + MONTH_NAMES + r' \d{1,2},? \d{2,4}|'
+            r'\d{1,2} ' + MONTH_NAMES + r' \d{2,4})\b'
+        ),
+        'flags': re.IGNORECASE,
+        'substring_keywords': True
+    },
+    {
+        'name': 'amount',
+        'keywords': ['amount', 'total', 'sum', 'cost', 'price'],
+        'pattern': r'\$\s*\d+(?:,\d+)*(?:\.\d+)?|\d+(?:,\d+)*(?:\.\d+)?\s*(?:dollars|USD|€|£|euros|pounds)',
+        'substring_keywords': True
+    },
+    {
+        'name': 'id',
+        'keywords': ['id', 'number', 'reference', 'code'],
+        'pattern': r'\b(?:[A-Z0-9]{2,}-[A-Z0-9]{2,}(?:-[A-Z0-9]{2,})*|[A-Z]{2,}\d{4,}|\d{4,}[A-Z]{2,}|[A-Z]{2}\d{6,})\b',
+        'substring_keywords': True
+    },
+    {
+        'name': 'iban',
+        'keywords': ['iban'],
+        'pattern': r'\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b'
+    },
+    {
+        'name': 'vat',
+        'keywords': ['vat', 'tax id', 'tax number'],
+        'pattern': r'\b(?:ATU\d{8}|BE[01]\d{9}|DE\d{9}|FR[A-Z0-9]{2}\d{9}|GB\d{9}(?:\d{3})?|NL\d{9}B\d{2}|[A-Z]{2}\d{8,12})\b'
+    },
+    {
+        'name': 'phone',
+        'keywords': ['phone', 'mobile', 'fax'],
+        'pattern': r'(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{1,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){2,4}(?!\w)'
+    }
+]
+
+# re flags that a family's pattern can be scoped with inside the combined pattern
+INLINE_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's', re.VERBOSE: 'x', re.ASCII: 'a'}
+
+
+def load_pattern_library(path=None):
+    """
+    Return the pattern library, extended with the families defined in a JSON file
+    
+    The file holds a list of {"name", "keywords", "pattern", "flags"} objects, where
+    flags is a list of re flag names such as ["IGNORECASE"]; patterns are combined
+    into one regex, so they must not use numbered backreferences. A family with the name
+    of a built-in one replaces it in place; new families are tried after the
+    built-in ones.
+    
+    Args:
+        path: Path to the JSON file, or None for the built-in library
+        
+    Returns:
+        list: Pattern families in priority order
+    """
+    library = [dict(family) for family in PATTERN_LIBRARY]
+    if not path:
+        return library
+    
+    with open(path, encoding='utf-8') as f:
+        custom_families = json.load(f)
+    
+    for custom in custom_families:
+        flags = 0
+        for flag_name in custom.get('flags', []):
+            flags |= getattr(re, flag_name)
+        family = {
+            'name': custom['name'],
+            'keywords': [keyword.lower() for keyword in custom['keywords']],
+            'pattern': custom['pattern'],
+            'flags': flags
+        }
+        
+        names = [existing['name'] for existing in library]
+        if family['name'] in names:
+            library[names.index(family['name'])] = family
+        else:
+            library.append(family)
+    
+    # Fail at startup rather than on the first extraction if a family can't be combined
+    compile_pattern_families(library)
+    
+    return library
+
+
+def family_is_requested(family, instructions_lower):
+    """Return True if lowercased instructions contain one of a pattern family's keywords"""
+    if family.get('substring_keywords'):
+        return any(keyword in instructions_lower for keyword in family['keywords'])
+    
+    # 'vat' must not fire on "private" or "renovation"
+    return any(
+        re.search(r'\b' + re.escape(keyword) + r'\b', instructions_lower)
+        for keyword in family['keywords']
+    )
+
+
+def compile_pattern_families(families):
+    """
+    Combine pattern families into one regex that finds all of them in a single scan
+    
+    Each family is an optional lookahead with its own group (f0, f1, ... in
+    priority order), so at every position the regex records which families
+    match there, even when their matches overlap. A family's group at the first
+    position it is set holds the same match as the family's own search().
+    Positions where no family matches are skipped by the final conditional.
+    
+    Args:
+        families: Pattern family dicts, in priority order
+        
+    Returns:
+        re.Pattern: Zero-width pattern with one group per family
+    """
+    lookaheads = []
+    for rank, family in enumerate(families):
+        flags = family.get('flags', 0)
+        letters = ''.join(letter for flag, letter in INLINE_FLAGS.items() if flags & flag)
+        if flags & ~sum(INLINE_FLAGS):
+            raise ValueError(f"Unsupported flags in pattern family {family['name']}")
+        
+        pattern = f"(?{letters}:{family['pattern']})" if letters else f"(?:{family['pattern']})"
+        lookaheads.append(f"(?=(?P<f{rank}>{pattern})|)")
+    
+    # Fail unless at least one family's group is set
+    require_match = '(?!)'
+    for rank in reversed(range(len(families))):
+        require_match = f"(?(f{rank})|{require_match})"
+    
+    return re.compile(''.join(lookaheads) + require_match)
 
 
 class NLPExtractor:
     """Class for extracting data based on natural language instructions"""
     
-    def __init__(self):
-        """Initialize NLP components"""
-        try:
-            # Load spaCy model
-            self.nlp = spacy.load('en_core_web_sm')
+    def __init__(self, doc_cache_size=32, instruction_cache_size=1024, sentence_top_k=5,
+                 sentence_cache_size=1024, pattern_library=None):
+        """
+        Initialize the extractor; spaCy and NLTK are loaded on first use
+        
+        Args:
+            doc_cache_size: Number of parsed page texts kept in the LRU cache
+            instruction_cache_size: Number of analyzed instructions kept in memory
+            sentence_top_k: Number of candidate sentences per page that are run
+                through spaCy (0 parses whole pages)
+            sentence_cache_size: Number of parsed candidate sentences kept in the LRU cache
+            pattern_library: Typed value pattern families in priority order
+                (defaults to PATTERN_LIBRARY, see load_pattern_library)
+        """
+        self.doc_cache_size = doc_cache_size
+        self.instruction_cache_size = instruction_cache_size
+        self.sentence_top_k = sentence_top_k
+        self.sentence_cache_size = sentence_cache_size
+        self._doc_cache = OrderedDict()
+        self._sentence_doc_cache = OrderedDict()
+        self._sentence_index_cache = OrderedDict()
+        self._instruction_cache = {}
+        
+        self.pattern_library = pattern_library if pattern_library is not None else PATTERN_LIBRARY
+        # Combined regexes keyed by the tuple of active family names
+        self._combined_patterns = {}
+        
+        self._nlp = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self.page_disabled_pipes = []
+        self.lemmatizer = None
+        self.stop_words = None
+    
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded the first time it is needed (None if unavailable)"""
+        if not self._loaded:
+            self.load()
+        return self._nlp
+    
+    @property
+    def loaded(self):
+        return self._loaded
+    
+    def load(self):
+        """
+        Load spaCy and NLTK components
+        
+        Called on the first nlp rule; call it up front to preload the models, e.g.
+        in a gunicorn master so forked workers share them copy-on-write.
+        """
+        with self._load_lock:
+            if self._loaded:
+                return
             
-            # Initialize NLTK components
-            self.lemmatizer = WordNetLemmatizer()
-            self.stop_words = set(stopwords.words('english'))
-        except Exception as e:
-            print(f"Warning: Failed to initialize NLP components: {str(e)}")
-            self.nlp = None
-            self.lemmatizer = None
-            self.stop_words = None
+            try:
+                # Imported here so starting the app doesn't pay for spaCy and NLTK
+                import spacy
+                from nltk.corpus import stopwords
+                from nltk.stem import WordNetLemmatizer
+                
+                # Load spaCy model
+                self._nlp = spacy.load('en_core_web_sm')
+                self.page_disabled_pipes = [name for name in PAGE_DISABLED_PIPES if name in self._nlp.pipe_names]
+                
+                # Initialize NLTK components
+                self.lemmatizer = WordNetLemmatizer()
+                self.stop_words = set(stopwords.words('english'))
+            except Exception as e:
+                print(f"Warning: Failed to initialize NLP components: {str(e)}")
+                self._nlp = None
+                self.page_disabled_pipes = []
+                self.lemmatizer = None
+                self.stop_words = None
+            
+            self._loaded = True
     
     def extract_from_text(self, text, instructions):
         """
@@ -38,24 +272,135 @@ class NLPExtractor:
         if not self.nlp:
             return {'value': '', 'context': 'NLP components not initialized'}
         
-        # Process the text and instructions with spaCy
-        doc = self.nlp(text)
-        instructions_doc = self.nlp(instructions.lower())
+        # Each page text (or candidate sentence) and each instruction is only parsed once
+        analysis = self._analyze_instructions(instructions)
+        candidates = self._candidate_sentences(text, analysis)
+        
+        if candidates is None:
+            sentences = list(self._get_doc(text).sents)
+        else:
+            sentences = [sent for candidate in candidates for sent in self._get_sentence_doc(candidate).sents]
+        
+        return self._extract_from_sentence_spans(sentences, analysis)
+    
+    def extract_many(self, items, batch_size=64, n_process=1):
+        """
+        Extract information for many (text, instructions) pairs at once
+        
+        Unique page texts (or, with the sentence prefilter, unique candidate
+        sentences) and instructions are parsed with nlp.pipe, which batches them
+        through the pipeline and can spread the work over several processes.
+        
+        Args:
+            items: Iterable of (text, instructions) tuples
+            batch_size: Number of texts sent through the pipeline at a time
+            n_process: Number of processes used by nlp.pipe
+            
+        Returns:
+            list: Extracted information dicts, in the same order as items
+        """
+        items = list(items)
+        
+        if not self.nlp:
+            return [{'value': '', 'context': 'NLP components not initialized'} for _ in items]
+        
+        # Analyze each distinct instruction once; the prefilter needs the key phrases
+        new_instructions = [
+            instructions for instructions in dict.fromkeys(instructions for _, instructions in items)
+            if instructions not in self._instruction_cache
+        ]
+        instruction_docs = self.nlp.pipe(
+            [instructions.lower() for instructions in new_instructions],
+            batch_size=batch_size
+        )
+        for instructions, instructions_doc in zip(new_instructions, instruction_docs):
+            self._analyze_instructions(instructions, instructions_doc)
+        
+        analyses = [self._analyze_instructions(instructions) for _, instructions in items]
+        candidates = [self._candidate_sentences(text, analysis) for (text, _), analysis in zip(items, analyses)]
+        results = [None] * len(items)
+        
+        # Items are extracted as soon as their Docs come out of nlp.pipe, so only the
+        # pipe's current batch (and the LRU caches) are held in memory
+        page_items = {}
+        sentence_items = {}
+        for index, ((text, _), candidate) in enumerate(zip(items, candidates)):
+            if candidate is None:
+                page_items.setdefault(text, []).append(index)
+            else:
+                for sentence in dict.fromkeys(candidate):
+                    sentence_items.setdefault(sentence, []).append(index)
+        
+        # Parse each distinct page text that has no candidates once
+        pages = [text for text in page_items if text not in self._doc_cache]
+        for text, indexes in page_items.items():
+            if text in self._doc_cache:
+                spans = list(self._get_doc(text).sents)
+                for index in indexes:
+                    results[index] = self._extract_from_sentence_spans(spans, analyses[index])
+        
+        for text, doc in zip(pages, self._pipe(pages, batch_size, n_process)):
+            _lru_put(self._doc_cache, text, doc, self.doc_cache_size)
+            spans = list(doc.sents)
+            for index in page_items[text]:
+                results[index] = self._extract_from_sentence_spans(spans, analyses[index])
+        
+        # Parse each distinct candidate sentence once. An item is extracted when the
+        # last of its sentences arrives; a parsed sentence is kept until every item
+        # using it is done
+        sentences = [sentence for sentence in sentence_items if sentence not in self._sentence_doc_cache]
+        missing = Counter(index for sentence in sentences for index in sentence_items[sentence])
+        uses = Counter({sentence: len(sentence_items[sentence]) for sentence in sentences})
+        parsed = {}
+        
+        def extract_item(index):
+            spans = []
+            for sentence in candidates[index]:
+                doc = parsed.get(sentence)
+                if doc is None:
+                    doc = self._get_sentence_doc(sentence)
+                spans.extend(doc.sents)
+            results[index] = self._extract_from_sentence_spans(spans, analyses[index])
+            
+            for sentence in dict.fromkeys(candidates[index]):
+                if sentence in parsed:
+                    uses[sentence] -= 1
+                    if not uses[sentence]:
+                        del parsed[sentence]
         
-        # Extract key phrases from instructions
-        key_phrases = self._extract_key_phrases(instructions)
+        for index, candidate in enumerate(candidates):
+            if candidate is not None and not missing[index]:
+                extract_item(index)
         
-        # Get entities from instructions
-        entities = [ent.text.lower() for ent in instructions_doc.ents]
+        for sentence, doc in zip(sentences, self._pipe(sentences, batch_size, n_process)):
+            _lru_put(self._sentence_doc_cache, sentence, doc, self.sentence_cache_size)
+            parsed[sentence] = doc
+            for index in sentence_items[sentence]:
+                missing[index] -= 1
+                if not missing[index]:
+                    extract_item(index)
         
+        return results
+    
+    def _pipe(self, texts, batch_size, n_process):
+        """Lazily parse texts with nlp.pipe, without the pipes page extraction doesn't need"""
+        return self.nlp.pipe(
+            texts,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=self.page_disabled_pipes
+        )
+    
+    def _extract_from_sentence_spans(self, sentences, analysis):
+        """Extract information from parsed sentences using analyzed instructions"""
         # Find sentences that might contain the requested information
-        relevant_sentences = self._find_relevant_sentences(doc, key_phrases, entities)
+        relevant_sentences = self._find_relevant_sentences(sentences, analysis['key_phrases'], analysis['entities'])
         
         if not relevant_sentences:
             return {'value': '', 'context': 'No relevant information found'}
         
         # Extract specific information from the relevant sentences
-        extracted_info = self._extract_from_sentences(relevant_sentences, instructions)
+        extracted_info = self._extract_from_sentences(relevant_sentences, analysis)
         
         if not extracted_info:
             # If no specific info found, return the most relevant sentence
@@ -67,12 +412,163 @@ class NLPExtractor:
         
         return extracted_info
     
-    def _extract_key_phrases(self, text):
-        """Extract important phrases from the instructions"""
-        # Convert to lowercase and tokenize
-        text = text.lower()
-        doc = self.nlp(text)
+    def config_digest(self):
+        """
+        Return a digest of the settings that change what nlp rules extract
+        
+        The loaded spaCy model is part of it, so the empty results of a run
+        without the model aren't reused once the model is installed.
+        """
+        nlp = self.nlp
+        settings = {
+            'model': [nlp.meta.get('name'), nlp.meta.get('version')] if nlp is not None else None,
+            'sentence_top_k': self.sentence_top_k,
+            'pattern_library': [
+                [
+                    family['name'],
+                    family['keywords'],
+                    family['pattern'],
+                    int(family.get('flags', 0)),
+                    bool(family.get('substring_keywords'))
+                ]
+                for family in self.pattern_library
+            ]
+        }
+        return hashlib.sha256(json.dumps(settings).encode('utf-8')).hexdigest()
+    
+    def clear_caches(self):
+        """Drop all cached parses"""
+        self._doc_cache.clear()
+        self._sentence_doc_cache.clear()
+        self._sentence_index_cache.clear()
+        self._instruction_cache.clear()
+    
+    def _get_doc(self, text):
+        """Return the spaCy Doc for a page text, parsing it only on a cache miss"""
+        doc = _lru_get(self._doc_cache, text)
         
+        if doc is None:
+            doc = self.nlp(text, disable=self.page_disabled_pipes)
+            _lru_put(self._doc_cache, text, doc, self.doc_cache_size)
+        
+        return doc
+    
+    def _get_sentence_doc(self, sentence):
+        """Return the spaCy Doc for a candidate sentence, parsing it only on a cache miss"""
+        doc = _lru_get(self._sentence_doc_cache, sentence)
+        
+        if doc is None:
+            doc = self.nlp(sentence, disable=self.page_disabled_pipes)
+            _lru_put(self._sentence_doc_cache, sentence, doc, self.sentence_cache_size)
+        
+        return doc
+    
+    def _candidate_sentences(self, text, analysis):
+        """
+        Pick the sentences of a page worth running the spaCy pipeline on
+        
+        Sentences are split with a regex and scored by the share of each key
+        phrase's and entity's tokens they contain, looked up in an inverted index
+        over the page's tokens. Only the top sentence_top_k are parsed.
+        
+        Args:
+            text: Page text
+            analysis: Analyzed instructions
+            
+        Returns:
+            list: Candidate sentence texts in page order, or None when the whole
+                page should be parsed (prefilter off, short page or no overlap)
+        """
+        if not self.sentence_top_k:
+            return None
+        
+        sentences, index = self._sentence_index(text)
+        if len(sentences) <= self.sentence_top_k:
+            return None
+        
+        scores = Counter()
+        for phrase in analysis['key_phrases'] + analysis['entities']:
+            tokens = set(TOKEN_PATTERN.findall(phrase.lower()))
+            if not tokens:
+                continue
+            
+            hits = Counter(position for token in tokens for position in index.get(token, ()))
+            for position, count in hits.items():
+                scores[position] += 2 * count / len(tokens)
+        
+        # Without any overlap the pipeline's entity scoring decides, which needs the whole page
+        if not scores:
+            return None
+        
+        top = heapq.nlargest(self.sentence_top_k, scores, key=lambda position: (scores[position], -position))
+        return [sentences[position] for position in sorted(top)]
+    
+    def _sentence_index(self, text):
+        """Return (sentences, {token: sentence positions}) for a page text, cached per text"""
+        entry = _lru_get(self._sentence_index_cache, text)
+        
+        if entry is None:
+            sentences = [sentence.strip() for sentence in SENTENCE_BOUNDARY_PATTERN.split(text) if sentence.strip()]
+            index = {}
+            for position, sentence in enumerate(sentences):
+                for token in set(TOKEN_PATTERN.findall(sentence.lower())):
+                    index.setdefault(token, []).append(position)
+            
+            entry = (sentences, index)
+            _lru_put(self._sentence_index_cache, text, entry, self.doc_cache_size)
+        
+        return entry
+    
+    def _analyze_instructions(self, instructions, instructions_doc=None):
+        """
+        Parse instructions once and memoize what the extraction needs from them
+        
+        Args:
+            instructions: Natural language instructions
+            instructions_doc: Already parsed lowercased instructions, if available
+            
+        Returns:
+            dict: key_phrases, entities, target_entity_types, pattern_families
+                and instructions_lower
+        """
+        analysis = self._instruction_cache.get(instructions)
+        if analysis is not None:
+            return analysis
+        
+        instructions_lower = instructions.lower()
+        if instructions_doc is None:
+            instructions_doc = self.nlp(instructions_lower)
+        
+        # Check if we're looking for specific entity types
+        target_entity_types = []
+        for key, entity_types in ENTITY_TYPE_MAPPING.items():
+            if key in instructions_lower:
+                target_entity_types.extend(entity_types)
+        
+        # Typed value patterns the instructions ask for
+        pattern_families = tuple(
+            family['name'] for family in self.pattern_library
+            if family_is_requested(family, instructions_lower)
+        )
+        
+        analysis = {
+            'instructions_lower': instructions_lower,
+            # Extract key phrases from instructions
+            'key_phrases': self._extract_key_phrases(instructions_doc),
+            # Get entities from instructions
+            'entities': [ent.text.lower() for ent in instructions_doc.ents],
+            'target_entity_types': target_entity_types,
+            'pattern_families': pattern_families
+        }
+        
+        if len(self._instruction_cache) >= self.instruction_cache_size:
+            self._instruction_cache.clear()
+        self._instruction_cache[instructions] = analysis
+        
+        return analysis
+    
+    def _extract_key_phrases(self, doc):
+        """Extract important phrases from the parsed (lowercased) instructions"""
         key_phrases = []
         
         # Extract noun phrases
@@ -120,11 +616,8 @@ class NLPExtractor:
         
         return key_phrases
     
-    def _find_relevant_sentences(self, doc, key_phrases, entities):
-        """Find sentences in the text that might contain the requested information"""
-        # Split into sentences
-        sentences = list(doc.sents)
-        
+    def _find_relevant_sentences(self, sentences, key_phrases, entities):
+        """Find sentences that might contain the requested information"""
         # Score each sentence based on key phrases and entities
         sentence_scores = []
         
@@ -159,32 +652,9 @@ class NLPExtractor:
         # Return top sentences with a score above 0
         return [sent for sent, score in sentence_scores if score > 0]
     
-    def _extract_from_sentences(self, sentences, instructions):
+    def _extract_from_sentences(self, sentences, analysis):
         """Extract specific information from the relevant sentences"""
-        instructions_lower = instructions.lower()
-        
-        # Check if we're looking for specific entity types
-        entity_type_mapping = {
-            'date': ['DATE', 'TIME'],
-            'time': ['TIME', 'DATE'],
-            'money': ['MONEY', 'CARDINAL'],
-            'amount': ['MONEY', 'QUANTITY', 'CARDINAL'],
-            'percentage': ['PERCENT'],
-            'number': ['CARDINAL', 'ORDINAL', 'QUANTITY'],
-            'person': ['PERSON'],
-            'name': ['PERSON', 'ORG'],
-            'organization': ['ORG'],
-            'company': ['ORG'],
-            'location': ['LOC', 'GPE'],
-            'address': ['LOC', 'GPE'],
-            'city': ['GPE'],
-            'country': ['GPE']
-        }
-        
-        target_entity_types = []
-        for key, entity_types in entity_type_mapping.items():
-            if key in instructions_lower:
-                target_entity_types.extend(entity_types)
+        target_entity_types = analysis['target_entity_types']
         
         # Look for specific entities in the sentences
         if target_entity_types:
@@ -198,39 +668,9 @@ class NLPExtractor:
                         }
         
         # Check for specific patterns based on the instructions
-        
-        # Date patterns
-        if any(word in instructions_lower for word in ['date', 'when', 'time']):
-            date_pattern = r'\b(?:\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4}|(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2},? \d{2,4}|\d{1,2} (?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{2,4})\b'
-            for sentence in sentences:
-                matches = re.findall(date_pattern, sentence.text, re.IGNORECASE)
-                if matches:
-                    return {
-                        'value': matches[0],
-                        'context': sentence.text
-                    }
-        
-        # Amount patterns
-        if any(word in instructions_lower for word in ['amount', 'total', 'sum', 'cost', 'price']):
-            amount_pattern = r'\$\s*\d+(?:,\d+)*(?:\.\d+)?|\d+(?:,\d+)*(?:\.\d+)?\s*(?:dollars|USD|€|£|euros|pounds)'
-            for sentence in sentences:
-                matches = re.findall(amount_pattern, sentence.text)
-                if matches:
-                    return {
-                        'value': matches[0],
-                        'context': sentence.text
-                    }
-        
-        # ID or reference number patterns
-        if any(word in instructions_lower for word in ['id', 'number', 'reference', 'code']):
-            id_pattern = r'\b(?:[A-Z0-9]{2,}-[A-Z0-9]{2,}(?:-[A-Z0-9]{2,})*|[A-Z]{2,}\d{4,}|\d{4,}[A-Z]{2,}|[A-Z]{2}\d{6,})\b'
-            for sentence in sentences:
-                matches = re.findall(id_pattern, sentence.text)
-                if matches:
-                    return {
-                        'value': matches[0],
-                        'context': sentence.text
-                    }
+        match = self._match_patterns(sentences, analysis['pattern_families'])
+        if match:
+            return match
         
         # If no specific information was found, return the most relevant sentence
         if sentences:
@@ -240,4 +680,64 @@ class NLPExtractor:
                 'context': most_relevant.text.strip()
             }
         
-        return None
\ No newline at end of file
+        return None
+    
+    def _match_patterns(self, sentences, pattern_families):
+        """
+        Look for the active pattern families' values in the sentences
+        
+        The highest priority family that matches anywhere wins, taking its first
+        match in sentence order. All active families are found in one scan per
+        sentence: the combined pattern reports every family matching at a
+        position, so a lower priority match that starts earlier can't hide an
+        overlapping higher priority one.
+        
+        Args:
+            sentences: Sentence spans, most relevant first
+            pattern_families: Names of the active families, in priority order
+            
+        Returns:
+            dict: value and context, or None if no family matched
+        """
+        if not pattern_families:
+            return None
+        
+        pattern = self._combined_patterns.get(pattern_families)
+        if pattern is None:
+            families = {family['name']: family for family in self.pattern_library}
+            pattern = compile_pattern_families([families[name] for name in pattern_families])
+            self._combined_patterns[pattern_families] = pattern
+        
+        best_rank = len(pattern_families)
+        best = None
+        
+        for sentence in sentences:
+            for match in pattern.finditer(sentence.text):
+                # Only a family ranked above the best one so far can replace it; the
+                # first position a family is seen at is its earliest match
+                for rank in range(best_rank):
+                    value = match.group(f'f{rank}')
+                    if value is not None:
+                        best_rank = rank
+                        best = {'value': value, 'context': sentence.text}
+                        break
+                
+                if best_rank == 0:
+                    return best
+        
+        return best
+
+
+def _lru_get(cache, key):
+    """Return a cached value and mark it as recently used, or None"""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _lru_put(cache, key, value, size):
+    """Cache a value, evicting the least recently used entry when full"""
+    cache[key] = value
+    if len(cache) > size:
+        cache.popitem(last=False)
\ No newline at end of file
@@ -1,14 +1,37 @@
-import re
-import pandas as pd
 from extractors.nlp_extractor import NLPExtractor
+from extractors.rule_set import CompiledRuleSet
+
+
+# Columns of a rule sheet and the values used for missing columns or empty cells
+RULE_COLUMN_DEFAULTS = {
+    'field_name': '',
+    'search_pattern': '',
+    'extraction_type': 'exact',
+    'context_before': '',
+    'context_after': '',
+    'instructions': ''
+}
 
 
 class PatternExtractor:
     """Class for extracting data based on patterns and instructions"""
     
-    def __init__(self):
-        """Initialize extractor components"""
-        self.nlp_extractor = NLPExtractor()
+    def __init__(self, nlp_batch_size=64, nlp_n_process=1, search_index=None, nlp_extractor=None):
+        """
+        Initialize extractor components
+        
+        Args:
+            nlp_batch_size: Batch size used when parsing pages for nlp rules
+            nlp_n_process: Number of processes used when parsing pages for nlp rules
+            search_index: Optional PageSearchIndex used to skip pages that can't
+                match a literal rule
+            nlp_extractor: Object used for nlp rules, e.g. an NLPServiceClient;
+                defaults to an in-process NLPExtractor
+        """
+        self.nlp_extractor = nlp_extractor or NLPExtractor()
+        self.search_index = search_index
+        self.nlp_batch_size = nlp_batch_size
+        self.nlp_n_process = nlp_n_process
     
     def load_rules_from_excel(self, excel_path):
         """
@@ -20,189 +43,162 @@ class PatternExtractor:
         Returns:
             list: List of extraction rules
         """
+        # pandas is only needed when a sheet is parsed, so it isn't imported at startup
+        import pandas as pd
+        
         try:
-            df = pd.read_excel(excel_path)
+            df = pd.read_excel(excel_path, dtype=object)
             
             # Check required columns
             if 'field_name' not in df.columns:
                 raise ValueError("Excel file must have a 'field_name' column")
             
-            rules = []
+            # Add missing optional columns, fill empty cells and normalize whole columns at once
+            for column, default in RULE_COLUMN_DEFAULTS.items():
+                if column not in df.columns:
+                    df[column] = default
+            df = df[list(RULE_COLUMN_DEFAULTS)].fillna(RULE_COLUMN_DEFAULTS).astype(str)
             
-            for _, row in df.iterrows():
-                rule = {
-                    'field_name': row['field_name'],
-                    'search_pattern': row.get('search_pattern', ''),
-                    'extraction_type': row.get('extraction_type', 'exact'),
-                    'context_before': row.get('context_before', ''),
-                    'context_after': row.get('context_after', ''),
-                    'instructions': row.get('instructions', '')
-                }
-                
-                # Validate rule
-                if not rule['field_name']:
-                    continue
-                
-                # For NLP extraction, the search pattern might be empty
-                if rule['extraction_type'] != 'nlp' and not rule['search_pattern']:
-                    continue
-                
-                rules.append(rule)
+            # Validate rules; for NLP extraction, the search pattern might be empty
+            valid = (df['field_name'] != '') & ((df['extraction_type'] == 'nlp') | (df['search_pattern'] != ''))
             
-            return rules
+            return df[valid].to_dict('records')
         
         except Exception as e:
             raise Exception(f"Failed to load rules from Excel: {str(e)}")
     
+    def config_digest(self, extraction_type):
+        """
+        Return a digest of the settings that change what rules of one type extract
+        
+        Args:
+            extraction_type: Rule extraction type
+            
+        Returns:
+            str: Digest to mix into the rule fingerprints (empty if nothing applies)
+        """
+        if extraction_type == 'nlp':
+            return self.nlp_extractor.config_digest()
+        
+        if extraction_type in ('exact', 'after_pattern') and self.search_index is not None:
+            return f"prefilter:{self.search_index.dialect if self.search_index.enabled else 'off'}"
+        
+        return ''
+    
+    def compile_rules(self, rules):
+        """
+        Compile extraction rules once so they can be applied to many documents
+        
+        Args:
+            rules: List of extraction rules
+            
+        Returns:
+            CompiledRuleSet: The compiled rules
+        """
+        return CompiledRuleSet(rules)
+    
     def extract_from_document(self, document, rules):
         """
         Extract data from a document based on rules
         
         Args:
             document: Document data structure 
-            rules: List of extraction rules
+            rules: List of extraction rules or a CompiledRuleSet
             
         Returns:
             list: List of extraction results
         """
-        results = []
-        
-        for page_num, page_text in document['pages'].items():
-            for rule_index, rule in enumerate(rules):
-                extraction_type = rule.get('extraction_type', 'exact')
-                
-                # Use NLP-based extraction if specified
-                if extraction_type == 'nlp':
-                    # Get instructions from the rule
-                    instructions = rule.get('instructions', '')
-                    if not instructions:
-                        continue
-                    
-                    nlp_result = self.nlp_extractor.extract_from_text(page_text, instructions)
-                    
-                    if nlp_result and nlp_result.get('value'):
-                        results.append({
-                            'rule_index': rule_index,
-                            'page_number': page_num,
-                            'value': nlp_result.get('value', ''),
-                            'context': nlp_result.get('context', '')
-                        })
-                else:
-                    # Use pattern-based extraction
-                    pattern = rule.get('search_pattern', '')
-                    if not pattern:
-                        continue
-                    
-                    matches = self._find_matches(page_text, pattern, rule)
-                    
-                    for match in matches:
-                        results.append({
-                            'rule_index': rule_index,
-                            'page_number': page_num,
-                            'value': match.get('value', ''),
-                            'context': match.get('context', '')
-                        })
-        
-        return results
+        return self.extract_from_documents([document], rules)[0]
     
-    def _find_matches(self, text, pattern, rule):
+    def extract_from_documents(self, documents, rules):
         """
-        Find matches in text based on pattern and rule
+        Extract data from several documents, batching all nlp rules together
         
         Args:
-            text: The text to search in
-            pattern: The search pattern
-            rule: The extraction rule with context and instructions
+            documents: List of document data structures
+            rules: List of extraction rules or a CompiledRuleSet
             
         Returns:
-            list: List of matches with value and context
+            list: One list of extraction results per document, in input order
         """
-        extraction_type = rule.get('extraction_type', 'exact')
-        context_before = rule.get('context_before', '')
-        context_after = rule.get('context_after', '')
-        
-        matches = []
-        
-        if extraction_type == 'exact':
-            # Find exact matches
-            idx = 0
-            while idx < len(text):
-                found_idx = text.find(pattern, idx)
-                if found_idx == -1:
-                    break
-                
-                # Extract context
-                context_start = max(0, found_idx - 100)
-                context_end = min(len(text), found_idx + len(pattern) + 100)
-                context = text[context_start:context_end]
-                
-                matches.append({
-                    'value': pattern,
-                    'context': context
-                })
+        rule_set = rules if isinstance(rules, CompiledRuleSet) else self.compile_rules(rules)
+        results = [[] for _ in documents]
+        nlp_items = []
+        nlp_targets = []
+        
+        literal_filter = self._literal_prefilter(documents, rule_set)
+        
+        for doc_index, document in enumerate(documents):
+            for page_num, page_text in document['pages'].items():
+                page_text = page_text or ''
                 
-                idx = found_idx + 1
+                page_literals = None
+                if literal_filter is not None:
+                    unfiltered, candidates = literal_filter
+                    page_literals = unfiltered | candidates.get((document.get('id'), page_num), set())
                 
-        elif extraction_type == 'regex':
-            # Find regex matches
-            try:
-                regex = re.compile(pattern)
-                for match in regex.finditer(text):
-                    value = match.group(0)
-                    
-                    # Extract context
-                    context_start = max(0, match.start() - 100)
-                    context_end = min(len(text), match.end() + 100)
-                    context = text[context_start:context_end]
-                    
-                    matches.append({
-                        'value': value,
-                        'context': context
+                # Use pattern-based extraction, scanning the page once for all rules
+                for rule_index, match in rule_set.match_page(page_text, page_literals):
+                    results[doc_index].append({
+                        'rule_index': rule_index,
+                        'page_number': page_num,
+                        'value': match.get('value', ''),
+                        'context': match.get('context', '')
                     })
-            except:
-                pass
-                
-        elif extraction_type == 'after_pattern':
-            # Extract text after pattern
-            idx = 0
-            while idx < len(text):
-                found_idx = text.find(pattern, idx)
-                if found_idx == -1:
-                    break
-                
-                # Extract text after pattern
-                start_pos = found_idx + len(pattern)
-                end_pos = start_pos
-                
-                # If context_after is specified, use it as a delimiter
-                if context_after:
-                    end_match = text.find(context_after, start_pos)
-                    if end_match != -1:
-                        end_pos = end_match
-                    else:
-                        # If delimiter not found, use the next 50 characters or end of line
-                        end_pos = min(start_pos + 50, len(text))
-                        newline_pos = text.find('\n', start_pos)
-                        if newline_pos != -1 and newline_pos < end_pos:
-                            end_pos = newline_pos
-                else:
-                    # If no delimiter, use the next 50 characters or end of line
-                    end_pos = min(start_pos + 50, len(text))
-                    newline_pos = text.find('\n', start_pos)
-                    if newline_pos != -1 and newline_pos < end_pos:
-                        end_pos = newline_pos
                 
-                # Extract value and context
-                value = text[start_pos:end_pos].strip()
-                context_start = max(0, found_idx - 50)
-                context_end = min(len(text), end_pos + 50)
-                context = text[context_start:context_end]
-                
-                matches.append({
-                    'value': value,
-                    'context': context
-                })
-                
-                idx = found_idx + 1
+                # Queue NLP-based extraction where specified
+                for rule_index in rule_set.nlp_rules:
+                    nlp_items.append((page_text, rule_set.rules[rule_index].get('instructions', '')))
+                    nlp_targets.append((doc_index, page_num, rule_index))
+        
+        if nlp_items:
+            nlp_results = self.nlp_extractor.extract_many(
+                nlp_items,
+                batch_size=self.nlp_batch_size,
+                n_process=self.nlp_n_process
+            )
+            
+            for (doc_index, page_num, rule_index), nlp_result in zip(nlp_targets, nlp_results):
+                if nlp_result and nlp_result.get('value'):
+                    results[doc_index].append({
+                        'rule_index': rule_index,
+                        'page_number': page_num,
+                        'value': nlp_result.get('value', ''),
+                        'context': nlp_result.get('context', '')
+                    })
+        
+        # Keep results in page order, then rule order, as when rules ran page by page
+        for doc_index, document in enumerate(documents):
+            page_order = {page_num: position for position, page_num in enumerate(document['pages'])}
+            results[doc_index].sort(key=lambda result: (page_order[result['page_number']], result['rule_index']))
+        
+        return results
+    
+    def _literal_prefilter(self, documents, rule_set):
+        """
+        Use the search index to find which literals can occur on which pages
+        
+        Returns:
+            tuple: (literals that can't be filtered, {(document_id, page_number): literals}),
+                or None if no literal can be narrowed down
+        """
+        if self.search_index is None or not rule_set.literal_rules:
+            return None
+        
+        document_ids = [document['id'] for document in documents if document.get('id') is not None]
+        unfiltered = set()
+        candidates = {}
+        
+        for literal in rule_set.literal_rules:
+            pages = self.search_index.candidate_pages(literal, document_ids)
+            if pages is None:
+                unfiltered.add(literal)
+                continue
+            
+            for page_key in pages:
+                candidates.setdefault(page_key, set()).add(literal)
+        
+        if len(unfiltered) == len(rule_set.literal_rules):
+            return None
         
-        return matches
\ No newline at end of file
+        return unfiltered, candidates
\ No newline at end of file
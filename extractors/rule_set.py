@@ -0,0 +1,232 @@
+import re
+import json
+import hashlib
+import functools
+
+try:
+    import ahocorasick  # Optional: pyahocorasick provides a C Aho-Corasick automaton
+except ImportError:
+    ahocorasick = None
+
+
+# Rule fields that determine what a rule extracts; the field name is only a label
+RULE_DEFINITION_FIELDS = ('search_pattern', 'context_before', 'context_after', 'instructions')
+
+# Bump when a change to the extraction code changes what rules return, so results
+# fingerprinted by earlier versions are computed again
+EXTRACTION_VERSION = 1
+
+
+def rule_definition_hash(rule, extractor_config=''):
+    """
+    Return a SHA-256 identifying what a rule extracts
+    
+    Rules with the same hash produce the same results on the same page text, so
+    results can be reused across rule sets and runs. Besides the rule itself the
+    hash covers EXTRACTION_VERSION and the extractor settings rules of its type
+    depend on.
+    
+    Args:
+        rule: Extraction rule dict
+        extractor_config: Digest of those settings, see PatternExtractor.config_digest
+        
+    Returns:
+        str: Hex digest of the rule definition
+    """
+    definition = [EXTRACTION_VERSION, extractor_config, rule.get('extraction_type') or 'exact']
+    definition += [str(rule.get(field) or '') for field in RULE_DEFINITION_FIELDS]
+    return hashlib.sha256(json.dumps(definition).encode('utf-8')).hexdigest()
+
+
+class CompiledRuleSet:
+    """Extraction rules compiled once so every page is scanned a single time for all literals"""
+    
+    def __init__(self, rules):
+        """
+        Compile a list of rules as returned by PatternExtractor.load_rules_from_excel
+        
+        Args:
+            rules: List of extraction rule dicts
+        """
+        self.rules = rules
+        self.literal_rules = {}  # literal -> indices of 'exact' / 'after_pattern' rules
+        self.regex_rules = []  # (rule_index, compiled regex)
+        self.nlp_rules = []  # indices of 'nlp' rules with instructions
+        
+        for rule_index, rule in enumerate(rules):
+            extraction_type = rule.get('extraction_type', 'exact')
+            
+            if extraction_type == 'nlp':
+                if rule.get('instructions'):
+                    self.nlp_rules.append(rule_index)
+                continue
+            
+            pattern = rule.get('search_pattern', '')
+            if not pattern:
+                continue
+            pattern = str(pattern)
+            
+            if extraction_type == 'regex':
+                regex = _compile_regex(pattern)
+                if regex is not None:
+                    self.regex_rules.append((rule_index, regex))
+            elif extraction_type in ('exact', 'after_pattern'):
+                self.literal_rules.setdefault(pattern, []).append(rule_index)
+        
+        self._literal_matcher = LiteralMatcher(self.literal_rules.keys())
+    
+    def __len__(self):
+        return len(self.rules)
+    
+    def match_page(self, text, literals=None):
+        """
+        Find all pattern-based matches on a page
+        
+        Args:
+            text: The page text
+            literals: Optional set of literals that may occur on this page (e.g. from
+                a full-text index); other literal rules are skipped
+                
+        Returns:
+            list: (rule_index, match) tuples ordered by rule index, then position
+        """
+        matches = {}
+        
+        found_literals = self._literal_matcher.find_all(text) if literals is None or literals else ()
+        
+        for found_idx, literal in found_literals:
+            if literals is not None and literal not in literals:
+                continue
+            
+            for rule_index in self.literal_rules[literal]:
+                rule = self.rules[rule_index]
+                
+                if rule.get('extraction_type', 'exact') == 'exact':
+                    match = _exact_match(text, found_idx, literal)
+                else:
+                    match = _after_pattern_match(text, found_idx, literal, rule.get('context_after', ''))
+                
+                matches.setdefault(rule_index, []).append(match)
+        
+        for rule_index, regex in self.regex_rules:
+            for regex_match in regex.finditer(text):
+                # Extract context
+                context_start = max(0, regex_match.start() - 100)
+                context_end = min(len(text), regex_match.end() + 100)
+                
+                matches.setdefault(rule_index, []).append({
+                    'value': regex_match.group(0),
+                    'context': text[context_start:context_end]
+                })
+        
+        return [
+            (rule_index, match)
+            for rule_index in sorted(matches)
+            for match in matches[rule_index]
+        ]
+
+
+class LiteralMatcher:
+    """Finds every (possibly overlapping) occurrence of a set of literals in one pass"""
+    
+    def __init__(self, literals):
+        """
+        Build the matcher
+        
+        Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise a
+        single lookahead regex that reports every position where a literal starts.
+        
+        Args:
+            literals: Iterable of literal strings
+        """
+        self.literals = sorted(set(literals), key=len, reverse=True)
+        self._automaton = None
+        self._regex = None
+        self._by_first_char = {}
+        
+        if not self.literals:
+            return
+        
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for literal in self.literals:
+                self._automaton.add_word(literal, literal)
+            self._automaton.make_automaton()
+        else:
+            for literal in self.literals:
+                self._by_first_char.setdefault(literal[0], []).append(literal)
+            alternation = '|'.join(re.escape(literal) for literal in self.literals)
+            self._regex = re.compile(f'(?=(?:{alternation}))')
+    
+    def find_all(self, text):
+        """
+        Yield (start_index, literal) for every occurrence, ordered by start index
+        
+        Args:
+            text: The text to search in
+        """
+        if self._automaton is not None:
+            found = [
+                (end_idx - len(literal) + 1, literal)
+                for end_idx, literal in self._automaton.iter(text)
+            ]
+            found.sort(key=lambda item: item[0])
+            yield from found
+        elif self._regex is not None:
+            for position_match in self._regex.finditer(text):
+                start = position_match.start()
+                # Several literals may start at the same position
+                for literal in self._by_first_char[text[start]]:
+                    if text.startswith(literal, start):
+                        yield start, literal
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_regex(pattern):
+    """Compile a rule regex once per process, returning None if it is invalid"""
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _exact_match(text, found_idx, pattern):
+    """Build the match for an 'exact' rule occurrence"""
+    # Extract context
+    context_start = max(0, found_idx - 100)
+    context_end = min(len(text), found_idx + len(pattern) + 100)
+    
+    return {
+        'value': pattern,
+        'context': text[context_start:context_end]
+    }
+
+
+def _after_pattern_match(text, found_idx, pattern, context_after):
+    """Build the match for an 'after_pattern' rule occurrence"""
+    # Extract text after pattern
+    start_pos = found_idx + len(pattern)
+    end_pos = None
+    
+    # If context_after is specified, use it as a delimiter
+    if context_after:
+        end_match = text.find(context_after, start_pos)
+        if end_match != -1:
+            end_pos = end_match
+    
+    # If no delimiter was found, use the next 50 characters or end of line
+    if end_pos is None:
+        end_pos = min(start_pos + 50, len(text))
+        newline_pos = text.find('\n', start_pos)
+        if newline_pos != -1 and newline_pos < end_pos:
+            end_pos = newline_pos
+    
+    # Extract value and context
+    value = text[start_pos:end_pos].strip()
+    context_start = max(0, found_idx - 50)
+    context_end = min(len(text), end_pos + 50)
+    
+    return {
+        'value': value,
+        'context': text[context_start:context_end]
+    }
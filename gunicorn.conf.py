@@ -0,0 +1,70 @@
+import os
+import sys
+import secrets
+import subprocess
+
+# Gunicorn reads this file automatically when started from the project directory
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Import the app once in the master and fork the workers from it. Combined with
+# PRELOAD_NLP=1 the spaCy model is loaded a single time and its memory is shared
+# copy-on-write by every worker instead of being loaded per worker. Off by default
+# because it can't be combined with --reload.
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0').lower() in ('1', 'true', 'yes')
+
+# Queued ingestion and extraction jobs are run by one worker pool process for the
+# whole server (python -m workers.job_queue), not by the web workers
+start_worker_pool = os.environ.get('WORKER_AUTOSTART', '1').lower() in ('1', 'true', 'yes')
+_worker_pool = None
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections instead of the master's"""
+    if not preload_app:
+        return
+    
+    from app import app
+    from database import db
+    
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+# With NLP_SERVICE_SOCKET set, one NLP service process holds the spaCy model for all workers
+nlp_service_socket = os.environ.get('NLP_SERVICE_SOCKET')
+_nlp_service = None
+
+# The service and the workers share a key through the environment; without one
+# configured, generate a random key for this server's lifetime. Done here because
+# the config is read before the app is imported (also with preload_app).
+if nlp_service_socket and not os.environ.get('NLP_SERVICE_AUTHKEY'):
+    os.environ['NLP_SERVICE_AUTHKEY'] = secrets.token_hex(32)
+
+
+def on_starting(server):
+    """Start the shared NLP service and the worker pool before any request queues work"""
+    global _nlp_service, _worker_pool
+    
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    if nlp_service_socket:
+        _nlp_service = subprocess.Popen(
+            [sys.executable, '-m', 'workers.nlp_service', '--socket', nlp_service_socket],
+            cwd=project_dir
+        )
+    
+    # Starting the pool also fails the jobs and removes the documents that workers
+    # of a previous server left unfinished
+    if start_worker_pool:
+        _worker_pool = subprocess.Popen([sys.executable, '-m', 'workers.job_queue'], cwd=project_dir)
+
+
+def on_exit(server):
+    """Stop the worker pool and the NLP service with the server"""
+    for process in (_worker_pool, _nlp_service):
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
\ No newline at end of file
@@ -1,3 +1,4 @@
+import json
 import datetime
 from database import db
 
@@ -9,7 +10,8 @@ class Document(db.Model):
     filename = db.Column(db.String(255), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)
     page_count = db.Column(db.Integer, default=0)
-    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of the uploaded file
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
     
     pages = db.relationship('Page', backref='document', lazy=True, cascade='all, delete-orphan')
     
@@ -19,45 +21,251 @@ class Document(db.Model):
 
 class Page(db.Model):
     __tablename__ = 'pages'
+    __table_args__ = (
+        db.Index('ix_pages_document_id_page_number', 'document_id', 'page_number'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=False)
     page_number = db.Column(db.Integer, nullable=False)
-    content = db.Column(db.Text, nullable=True)
+    # Page text can be large, so it's only loaded when accessed
+    content = db.deferred(db.Column(db.Text, nullable=True))
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 of content
+    extraction_method = db.Column(db.String(10), nullable=True)  # 'native' text layer or 'ocr'
     
     def __repr__(self):
         return f'<Page {self.document_id}:{self.page_number}>'
 
 
+class PageClassification(db.Model):
+    __tablename__ = 'page_classifications'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'content_hash', 'classifier_key', 'page_number',
+            name='uq_page_classifications_file_classifier_page'
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the uploaded file
+    classifier_key = db.Column(db.String(100), nullable=False, default='')  # Classifier version and settings
+    page_number = db.Column(db.Integer, nullable=False)
+    extraction_method = db.Column(db.String(10), nullable=False)  # 'native' or 'ocr'
+    reason = db.Column(db.String(255), nullable=True)  # Why the classifier chose the method
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PageClassification {self.content_hash[:8]}:{self.page_number} {self.extraction_method}>'
+
+
+class RuleSet(db.Model):
+    __tablename__ = 'rule_sets'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, index=True)  # Filename of the uploaded sheet
+    version = db.Column(db.Integer, default=1)  # Increases each time a changed sheet is uploaded under the same name
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)  # SHA-256 of the sheet
+    rule_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    
+    rules = db.relationship('ExtractionRule', backref='rule_set', lazy=True, order_by='ExtractionRule.position')
+    
+    def to_rules(self):
+        """Return the rule dicts used by the extractors, each with its rule_id"""
+        return [rule.to_dict() for rule in self.rules]
+    
+    def __repr__(self):
+        return f'<RuleSet {self.name} v{self.version}>'
+
+
 class ExtractionRule(db.Model):
     __tablename__ = 'extraction_rules'
     
     id = db.Column(db.Integer, primary_key=True)
+    rule_set_id = db.Column(db.Integer, db.ForeignKey('rule_sets.id'), nullable=True, index=True)
+    position = db.Column(db.Integer, default=0)  # Row order within the rule set
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     pattern = db.Column(db.String(255), nullable=False)
     context = db.Column(db.Text, nullable=True)
+    context_before = db.Column(db.Text, nullable=True)
+    context_after = db.Column(db.Text, nullable=True)
     extraction_type = db.Column(db.String(50), default='exact')  # 'exact', 'regex', 'after_pattern', 'nlp'
     instructions = db.Column(db.Text, nullable=True)  # For NLP-based instructions
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
+    def to_dict(self):
+        """Return the rule in the format produced by load_rules_from_excel"""
+        return {
+            'rule_id': self.id,
+            'field_name': self.name,
+            'search_pattern': self.pattern or '',
+            'extraction_type': self.extraction_type or 'exact',
+            'context_before': self.context_before or '',
+            'context_after': self.context_after or '',
+            'instructions': self.instructions or ''
+        }
+    
     def __repr__(self):
         return f'<ExtractionRule {self.name}>'
 
 
 class ExtractionResult(db.Model):
     __tablename__ = 'extraction_results'
+    __table_args__ = (
+        db.Index('ix_extraction_results_document_id_page_number', 'document_id', 'page_number'),
+        # Matches the results view's sort order within a run
+        db.Index('ix_extraction_results_run_order', 'run_id', 'document_id', 'page_number', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     document_id = db.Column(db.Integer, db.ForeignKey('documents.id'), nullable=False)
-    rule_id = db.Column(db.Integer, db.ForeignKey('extraction_rules.id'), nullable=False)
+    rule_id = db.Column(db.Integer, db.ForeignKey('extraction_rules.id'), nullable=False, index=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('extraction_runs.id'), nullable=True, index=True)
     page_number = db.Column(db.Integer, nullable=False)
     value = db.Column(db.Text, nullable=True)
     context = db.Column(db.Text, nullable=True)
+    page_hash = db.Column(db.String(64), nullable=True)  # Fingerprint of the page text the result came from
+    rule_hash = db.Column(db.String(64), nullable=True)  # Fingerprint of the rule definition
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
     rule = db.relationship('ExtractionRule', backref='results')
     document = db.relationship('Document', backref='extraction_results')
     
     def __repr__(self):
-        return f'<ExtractionResult {self.document_id}:{self.rule_id}>'
\ No newline at end of file
+        return f'<ExtractionResult {self.document_id}:{self.rule_id}>'
+
+
+class ExtractionFingerprint(db.Model):
+    __tablename__ = 'extraction_fingerprints'
+    __table_args__ = (
+        db.UniqueConstraint('page_hash', 'rule_hash', name='uq_extraction_fingerprints_page_rule'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    page_hash = db.Column(db.String(64), nullable=False)
+    rule_hash = db.Column(db.String(64), nullable=False)
+    results_json = db.Column(db.Text, nullable=False)  # Value/context dicts the rule produced on the page, often empty
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ExtractionFingerprint {self.page_hash[:8]}:{self.rule_hash[:8]}>'
+
+class IngestionJob(db.Model):
+    __tablename__ = 'ingestion_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(1024), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=True)  # Known when computed during a chunked upload
+    force = db.Column(db.Boolean, default=False)  # Reprocess even if an identical file was processed before
+    status = db.Column(db.String(20), default='queued', index=True)  # 'queued', 'running', 'completed', 'failed'
+    total_pages = db.Column(db.Integer, default=0)
+    processed_pages = db.Column(db.Integer, default=0)
+    document_id = db.Column(db.Integer, db.ForeignKey('documents.id', ondelete='SET NULL'), nullable=True)
+    cache_hit = db.Column(db.Boolean, nullable=True)  # True if an identical upload was reused
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Refreshed by the worker while the job runs
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    document = db.relationship('Document')
+    
+    def to_dict(self):
+        """Serialize the job status for the JSON status endpoint"""
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'total_pages': self.total_pages or 0,
+            'processed_pages': self.processed_pages or 0,
+            'document_id': self.document_id,
+            'cache_hit': self.cache_hit,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<IngestionJob {self.id} {self.status}>'
+
+
+
+class ExtractionRun(db.Model):
+    __tablename__ = 'extraction_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='queued', index=True)  # 'queued', 'running', 'completed', 'failed'
+    rule_set_id = db.Column(db.Integer, db.ForeignKey('rule_sets.id'), nullable=True, index=True)
+    incremental = db.Column(db.Boolean, default=True)  # Reuse results of page/rule pairs computed by earlier runs
+    rules_json = db.Column(db.Text, nullable=False)  # Rule dicts, each with the id of its saved ExtractionRule
+    document_ids_json = db.Column(db.Text, nullable=False)
+    total_documents = db.Column(db.Integer, default=0)
+    processed_documents = db.Column(db.Integer, default=0)
+    result_count = db.Column(db.Integer, default=0)
+    reused_pairs = db.Column(db.Integer, default=0)  # Page/rule pairs copied instead of extracted
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Refreshed by the worker while the run runs
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    results = db.relationship('ExtractionResult', backref='run', lazy='dynamic')
+    rule_set = db.relationship('RuleSet')
+    
+    @property
+    def rules(self):
+        return json.loads(self.rules_json)
+    
+    @property
+    def document_ids(self):
+        return json.loads(self.document_ids_json)
+    
+    def to_dict(self):
+        """Serialize the run status for the JSON status endpoint"""
+        return {
+            'id': self.id,
+            'status': self.status,
+            'total_documents': self.total_documents or 0,
+            'processed_documents': self.processed_documents or 0,
+            'result_count': self.result_count or 0,
+            'reused_pairs': self.reused_pairs or 0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<ExtractionRun {self.id} {self.status}>'
+
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # Random token used in the upload URLs
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(1024), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received_bytes = db.Column(db.BigInteger, default=0)
+    content_hash = db.Column(db.String(64), nullable=True)
+    status = db.Column(db.String(20), default='uploading')  # 'uploading', 'completed'
+    job_id = db.Column(db.Integer, db.ForeignKey('ingestion_jobs.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    def to_dict(self):
+        """Serialize the upload state so clients can resume"""
+        return {
+            'upload_id': self.id,
+            'filename': self.filename,
+            'total_size': self.total_size,
+            'received_bytes': self.received_bytes or 0,
+            'status': self.status,
+            'job_id': self.job_id
+        }
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received_bytes}/{self.total_size}>'
@@ -1,25 +1,72 @@
 import os
-from models import Document, Page
-from database import db
+import hashlib
+from sqlalchemy import insert, update, delete
+from models import Document, Page, PageClassification, ExtractionResult, IngestionJob
+from database import db, insert_ignoring_conflicts
 
 
 class DocumentProcessor:
     """Main document processor that delegates to specific processors based on file type"""
     
-    def __init__(self, processors=None):
-        """Initialize with a list of document processors"""
+    def __init__(self, processors=None, page_batch_size=100):
+        """
+        Initialize with a list of document processors
+        
+        Args:
+            processors: Processors tried in order for each file type
+            page_batch_size: Number of pages inserted and committed at a time
+        """
         self.processors = processors or []
+        self.page_batch_size = max(1, page_batch_size)
+    
+    def find_duplicate(self, content_hash):
+        """Return the earliest fully processed document with the same content hash, if any"""
+        # Documents still being processed (or abandoned by a crashed worker) have no page count yet
+        return (
+            Document.query
+            .filter(Document.content_hash == content_hash, Document.page_count > 0)
+            .order_by(Document.id)
+            .first()
+        )
+    
+    def load_classifications(self, content_hash, classifier_key=''):
+        """
+        Return the extraction methods recorded for the pages of a file
+        
+        Args:
+            content_hash: SHA-256 of the file
+            classifier_key: Classifier version and settings the decisions must have
+                been made with; decisions made with other settings are ignored
+            
+        Returns:
+            dict: page_number -> {'method', 'reason'}
+        """
+        classifications = PageClassification.query.filter_by(
+            content_hash=content_hash,
+            classifier_key=classifier_key
+        ).all()
+        return {
+            classification.page_number: {
+                'method': classification.extraction_method,
+                'reason': classification.reason
+            }
+            for classification in classifications
+        }
     
-    def process(self, file_path, filename):
+    def process(self, file_path, filename, progress_callback=None, content_hash=None, force=False):
         """
         Process a document file, extract text and store in the database
         
         Args:
             file_path: Path to the document file
             filename: Original filename
-            
+            progress_callback: Optional callable(processed_pages, total_pages)
+            content_hash: SHA-256 of the file if already known
+            force: Extract the file again even if an identical one was processed;
+                the native/OCR decisions recorded for its pages are reused
+                
         Returns:
-            tuple: (document_id, page_count)
+            tuple: (document_id, page_count, cache_hit)
         """
         # Get file extension
         _, file_extension = os.path.splitext(filename)
@@ -35,38 +82,164 @@ class DocumentProcessor:
         if not processor:
             raise ValueError(f"No processor available for file type: {file_extension}")
         
-        # Extract text from document
-        pages = processor.extract_text(file_path)
+        # Reuse the pages of an identical earlier upload instead of re-extracting
+        content_hash = content_hash or hash_file(file_path)
+        duplicate = None if force else self.find_duplicate(content_hash)
         
-        if not pages:
-            raise ValueError("No text could be extracted from the document")
+        if duplicate:
+            self._remove_file(file_path)
+            return duplicate.id, duplicate.page_count, True
         
-        # Create document record
+        # Create the document first so its pages can be committed as they are extracted
         document = Document(
             filename=filename,
             file_type=file_extension,
-            page_count=len(pages)
+            page_count=0,
+            content_hash=content_hash
         )
         db.session.add(document)
-        db.session.flush()  # Get the document ID
-        
-        # Create page records
-        for page_num, content in pages.items():
-            page = Page(
-                document_id=document.id,
-                page_number=page_num,
-                content=content
-            )
-            db.session.add(page)
+        db.session.commit()
+        document_id = document.id
+        
+        # Native/OCR decisions from an earlier run of the same file with the same classifier
+        # settings; new ones are added by the processor
+        classifier_key = getattr(processor, 'classification_key', '')
+        known_methods = self.load_classifications(content_hash, classifier_key)
+        page_methods = dict(known_methods)
+        
+        try:
+            pages = processor.iter_pages(file_path, progress_callback=progress_callback, page_methods=page_methods)
+            page_count = self._save_pages(document_id, pages, page_methods)
+            
+            if not page_count:
+                raise ValueError("No text could be extracted from the document")
+        except Exception:
+            db.session.rollback()
+            self._delete_document(document_id)
+            raise
         
-        # Commit to database
+        # Record the new decisions so reprocessing the file skips classifying its pages
+        new_classifications = [
+            {
+                'content_hash': content_hash,
+                'classifier_key': classifier_key,
+                'page_number': page_number,
+                'extraction_method': decision['method'],
+                'reason': (decision.get('reason') or '')[:255]
+            }
+            for page_number, decision in page_methods.items()
+            if page_number not in known_methods
+        ]
+        if new_classifications:
+            db.session.execute(insert_ignoring_conflicts(PageClassification), new_classifications)
+        
+        # Setting the page count marks the document as complete
+        db.session.execute(update(Document).where(Document.id == document_id).values(page_count=page_count))
         db.session.commit()
         
         # Clean up the temporary file
+        self._remove_file(file_path)
+        
+        return document_id, page_count, False
+    
+    def _save_pages(self, document_id, pages, page_methods):
+        """
+        Insert pages as they are produced, committing every page_batch_size pages
+        
+        Args:
+            document_id: ID of the document the pages belong to
+            pages: Iterable of (page_number, text) tuples
+            page_methods: Dict of page_number -> {'method', 'reason'} filled by the processor
+            
+        Returns:
+            int: Number of pages saved
+        """
+        page_count = 0
+        batch = []
+        
+        for page_num, content in pages:
+            batch.append({
+                'document_id': document_id,
+                'page_number': page_num,
+                'content': content,
+                'content_hash': hash_text(content),
+                'extraction_method': page_methods.get(page_num, {}).get('method')
+            })
+            
+            if len(batch) >= self.page_batch_size:
+                db.session.execute(insert(Page), batch)
+                db.session.commit()
+                page_count += len(batch)
+                batch = []
+        
+        if batch:
+            db.session.execute(insert(Page), batch)
+            db.session.commit()
+            page_count += len(batch)
+        
+        return page_count
+    
+    def delete_abandoned_documents(self):
+        """
+        Delete documents whose ingestion stopped before all their pages were saved
+        
+        A document's page count is only set once its last page is committed, so a
+        worker that was killed while processing leaves a document without one.
+        Documents of files a running job is still processing are kept.
+        
+        Returns:
+            int: Number of documents deleted
+        """
+        in_progress = db.session.query(IngestionJob.content_hash).filter(
+            IngestionJob.status == 'running',
+            IngestionJob.content_hash.isnot(None)
+        )
+        document_ids = [
+            document_id for (document_id,) in db.session.query(Document.id).filter(
+                Document.page_count == 0,
+                Document.content_hash.notin_(in_progress)
+            )
+        ]
+        
+        for document_id in document_ids:
+            self._delete_document(document_id)
+        
+        return len(document_ids)
+    
+    def _delete_document(self, document_id):
+        """Remove a partially processed document and the pages committed so far"""
+        db.session.execute(delete(ExtractionResult).where(ExtractionResult.document_id == document_id))
+        db.session.execute(delete(Page).where(Page.document_id == document_id))
+        db.session.execute(delete(Document).where(Document.id == document_id))
+        db.session.commit()
+    
+    def _remove_file(self, file_path):
+        """Remove a processed upload, ignoring errors"""
         if os.path.exists(file_path):
             try:
                 os.remove(file_path)
             except:
                 pass  # Ignore errors in cleanup
+
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute the SHA-256 of a file without loading it into memory
+    
+    Args:
+        file_path: Path to the file
+        chunk_size: Number of bytes read at a time
         
-        return document.id, len(pages)
\ No newline at end of file
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_text(text):
+    """Return the SHA-256 of a page text, used to recognize unchanged pages"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
\ No newline at end of file
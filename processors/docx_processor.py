@@ -1,23 +1,212 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
 import docx
 
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Text boxes are stored twice, as DrawingML and as a VML fallback; only the first is read
+FALLBACK_TAG = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+HEADER_FOOTER_PART_PATTERN = re.compile(r'^word/(header|footer)\d*\.xml$')
+PAGE_COUNT_PATTERN = re.compile(rb'<(?:\w+:)?Pages>(\d+)</')
+
+FALSE_VALUES = ('0', 'false', 'off')
+
 
 class DocxProcessor:
     """Processor for DOCX files"""
     
+    def __init__(self, paginate=True, max_page_chars=4000, rendered_page_breaks=True):
+        """
+        Initialize the DOCX processor
+        
+        Args:
+            paginate: Split the document into pages by streaming its XML; when False
+                the whole document is returned as a single page
+            max_page_chars: Pages longer than this are split at the next paragraph
+                or table row, which also paginates documents without any breaks
+            rendered_page_breaks: Also split where Word last laid out a page break
+        """
+        self.paginate = paginate
+        self.max_page_chars = max_page_chars
+        self.rendered_page_breaks = rendered_page_breaks
+    
     def can_process(self, file_extension):
         """Check if this processor can handle the given file extension"""
         return file_extension.lower() == 'docx'
     
-    def extract_text(self, file_path):
+    def extract_text(self, file_path, progress_callback=None):
         """
         Extract text from a DOCX file
         
         Args:
             file_path: Path to the DOCX file
+            progress_callback: Optional callable(processed_pages, total_pages)
             
         Returns:
             dict: A dictionary mapping page numbers to text content
         """
+        return dict(self.iter_pages(file_path, progress_callback=progress_callback))
+    
+    def iter_pages(self, file_path, progress_callback=None, page_methods=None):
+        """
+        Yield the pages of a DOCX file
+        
+        Pages end at explicit page breaks, section breaks and (optionally) the page
+        breaks Word rendered when the file was saved, and are capped at
+        max_page_chars. Tables are included; header text is added to the first page
+        and footer text to the last.
+        
+        Args:
+            file_path: Path to the DOCX file
+            progress_callback: Optional callable(processed_pages, total_pages)
+            page_methods: Optional dict the extraction method of each page is added to
+            
+        Yields:
+            tuple: (page_number, text)
+        """
+        for page_number, text in self._iter_pages(file_path, progress_callback):
+            if page_methods is not None:
+                page_methods[page_number] = {'method': 'native', 'reason': 'docx text'}
+            yield page_number, text
+    
+    def _iter_pages(self, file_path, progress_callback):
+        """Yield (page_number, text) for the configured pagination mode"""
+        if not self.paginate:
+            yield from self._iter_single_page(file_path, progress_callback)
+            return
+        
+        try:
+            archive = zipfile.ZipFile(file_path)
+        except Exception as e:
+            raise Exception(f"Failed to extract text from DOCX: {str(e)}")
+        
+        with archive:
+            try:
+                headers, footers = _read_headers_footers(archive)
+                # Page count saved by Word, only used to report progress
+                estimated_pages = _saved_page_count(archive)
+                
+                page_number = 0
+                previous = None
+                
+                # Each page is held back until the next one is complete, so the
+                # footers can be added to the last page
+                for text in self._iter_body_pages(archive):
+                    if previous is not None:
+                        page_number += 1
+                        yield page_number, _join_text(headers if page_number == 1 else '', previous)
+                        if progress_callback:
+                            progress_callback(page_number, max(estimated_pages, page_number + 1))
+                    previous = text
+            except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+                raise Exception(f"Failed to extract text from DOCX: {str(e)}")
+        
+        page_number += 1
+        yield page_number, _join_text(headers if page_number == 1 else '', previous or '', footers)
+        
+        if progress_callback:
+            progress_callback(page_number, page_number)
+    
+    def _iter_body_pages(self, archive):
+        """
+        Stream word/document.xml and yield the text of each non-empty page
+        
+        Args:
+            archive: Open zipfile of the DOCX file
+            
+        Yields:
+            str: Page text
+        """
+        parts = []
+        size = 0
+        body = None
+        cell_depth = 0
+        in_paragraph_properties = False
+        fallback_depth = 0
+        break_after_paragraph = False
+        
+        with archive.open('word/document.xml') as document_xml:
+            for event, element in ElementTree.iterparse(document_xml, events=('start', 'end')):
+                tag = element.tag
+                
+                # Fallback content duplicates its mc:Choice; its start and end events are
+                # both skipped so the depth counters stay balanced
+                if tag == FALLBACK_TAG:
+                    fallback_depth += 1 if event == 'start' else -1
+                    continue
+                if fallback_depth:
+                    continue
+                
+                if event == 'start':
+                    if tag == WORD_NAMESPACE + 'body':
+                        body = element
+                    elif tag == WORD_NAMESPACE + 'tc':
+                        cell_depth += 1
+                    elif tag == WORD_NAMESPACE + 'pPr':
+                        in_paragraph_properties = True
+                    continue
+                
+                page_break = False
+                
+                if tag == WORD_NAMESPACE + 't':
+                    if element.text:
+                        parts.append(element.text)
+                        size += len(element.text)
+                elif tag == WORD_NAMESPACE + 'tab':
+                    # Tab stops in paragraph properties are also called w:tab
+                    if not in_paragraph_properties:
+                        parts.append('\t')
+                elif tag == WORD_NAMESPACE + 'br':
+                    if element.get(WORD_NAMESPACE + 'type') == 'page':
+                        page_break = True
+                    else:
+                        parts.append('\n')
+                elif tag == WORD_NAMESPACE + 'cr':
+                    parts.append('\n')
+                elif tag == WORD_NAMESPACE + 'lastRenderedPageBreak':
+                    page_break = self.rendered_page_breaks
+                elif tag == WORD_NAMESPACE + 'pageBreakBefore':
+                    page_break = element.get(WORD_NAMESPACE + 'val', 'true') not in FALSE_VALUES
+                elif tag == WORD_NAMESPACE + 'sectPr':
+                    # A section break is stored in the properties of the section's last paragraph
+                    section_type = element.find(WORD_NAMESPACE + 'type')
+                    continuous = section_type is not None and section_type.get(WORD_NAMESPACE + 'val') == 'continuous'
+                    if in_paragraph_properties and not continuous:
+                        break_after_paragraph = True
+                elif tag == WORD_NAMESPACE + 'pPr':
+                    in_paragraph_properties = False
+                elif tag == WORD_NAMESPACE + 'p':
+                    parts.append(' ' if cell_depth else '\n')
+                    if not cell_depth:
+                        page_break = break_after_paragraph or size >= self.max_page_chars
+                        break_after_paragraph = False
+                elif tag == WORD_NAMESPACE + 'tc':
+                    cell_depth -= 1
+                    parts.append('\t')
+                elif tag == WORD_NAMESPACE + 'tr':
+                    parts.append('\n')
+                    page_break = not cell_depth and size >= self.max_page_chars
+                
+                # Drop finished top-level paragraphs and tables so memory stays flat
+                if body is not None and not cell_depth and tag in (WORD_NAMESPACE + 'p', WORD_NAMESPACE + 'tbl'):
+                    body.clear()
+                
+                if page_break:
+                    text = ''.join(parts).strip()
+                    parts = []
+                    size = 0
+                    # Consecutive breaks (e.g. an explicit break and Word's rendered one) make one page
+                    if text:
+                        yield text
+        
+        text = ''.join(parts).strip()
+        if text:
+            yield text
+    
+    def _iter_single_page(self, file_path, progress_callback=None):
+        """Yield the whole document as one page, read with python-docx"""
         try:
             # Open the DOCX file
             doc = docx.Document(file_path)
@@ -27,9 +216,54 @@ class DocxProcessor:
             
             # Combine all paragraphs
             text = '\n'.join(paragraphs)
-            
-            # DOCX doesn't really have pages, so we'll treat the whole document as one page
-            return {1: text}
-            
+        
         except Exception as e:
-            raise Exception(f"Failed to extract text from DOCX: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to extract text from DOCX: {str(e)}")
+        
+        if progress_callback:
+            progress_callback(1, 1)
+        
+        yield 1, text
+
+
+def _read_headers_footers(archive):
+    """
+    Return the distinct header and footer texts of a DOCX file
+    
+    Args:
+        archive: Open zipfile of the DOCX file
+        
+    Returns:
+        tuple: (headers, footers) as newline separated text
+    """
+    texts = {'header': [], 'footer': []}
+    
+    for name in sorted(archive.namelist()):
+        match = HEADER_FOOTER_PART_PATTERN.match(name)
+        if not match:
+            continue
+        
+        with archive.open(name) as part:
+            root = ElementTree.parse(part).getroot()
+        
+        for paragraph in root.iter(WORD_NAMESPACE + 'p'):
+            text = ''.join(t.text or '' for t in paragraph.iter(WORD_NAMESPACE + 't')).strip()
+            # Different first/even page variants often repeat the same text
+            if text and text not in texts[match.group(1)]:
+                texts[match.group(1)].append(text)
+    
+    return '\n'.join(texts['header']), '\n'.join(texts['footer'])
+
+
+def _saved_page_count(archive):
+    """Return the page count Word stored in docProps/app.xml, or 0 if unknown"""
+    try:
+        match = PAGE_COUNT_PATTERN.search(archive.read('docProps/app.xml'))
+    except KeyError:
+        return 0
+    return int(match.group(1)) if match else 0
+
+
+def _join_text(*parts):
+    """Join the non-empty parts of a page with newlines"""
+    return '\n'.join(part for part in parts if part)
\ No newline at end of file
@@ -1,33 +1,64 @@
-import pytesseract
 from PIL import Image
 
+from processors.ocr_pipeline import OCRPipeline
+
 
 class ImageProcessor:
     """Processor for image files (JPG, PNG, etc.)"""
     
+    def __init__(self, ocr_pipeline=None):
+        """
+        Initialize the image processor
+        
+        Args:
+            ocr_pipeline: OCRPipeline used for the images (defaults to the photo profile)
+        """
+        self.ocr_pipeline = ocr_pipeline or OCRPipeline.from_profile('photo')
+    
     def can_process(self, file_extension):
         """Check if this processor can handle the given file extension"""
         return file_extension.lower() in ['jpg', 'jpeg', 'png']
     
-    def extract_text(self, file_path):
+    def extract_text(self, file_path, progress_callback=None):
         """
         Extract text from an image file using OCR
         
         Args:
             file_path: Path to the image file
+            progress_callback: Optional callable(processed_pages, total_pages)
             
         Returns:
             dict: A dictionary mapping page numbers to text content
         """
+        return dict(self.iter_pages(file_path, progress_callback=progress_callback))
+    
+    def iter_pages(self, file_path, progress_callback=None, page_methods=None):
+        """
+        Yield the OCR text of an image file as a single page
+        
+        Args:
+            file_path: Path to the image file
+            progress_callback: Optional callable(processed_pages, total_pages)
+            page_methods: Optional dict the extraction method of each page is added to
+            
+        Yields:
+            tuple: (page_number, text)
+        """
         try:
             # Open the image
-            image = Image.open(file_path)
-            
-            # Use OCR to extract text
-            text = pytesseract.image_to_string(image)
-            
-            # Return as a single page
-            return {1: text}
-            
+            with Image.open(file_path) as image:
+                # Use OCR to extract text; large photos are downsampled first and
+                # only OCRed at full size if tesseract isn't confident
+                text = self.ocr_pipeline.ocr_image(image)['text']
+        
         except Exception as e:
-            raise Exception(f"Failed to extract text from image: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to extract text from image: {str(e)}")
+        
+        if progress_callback:
+            progress_callback(1, 1)
+        
+        if page_methods is not None:
+            page_methods[1] = {'method': 'ocr', 'reason': 'image'}
+        
+        # Return as a single page
+        yield 1, text
\ No newline at end of file
@@ -0,0 +1,269 @@
+import pytesseract
+from PIL import Image, ImageOps
+
+# Tesseract settings per kind of document: psm is the page segmentation mode and oem the
+# OCR engine mode (see `tesseract --help-extra`); the other keys tune the preprocessing
+OCR_PROFILES = {
+    # Scanned or rendered pages of text
+    'document': {'psm': 3, 'oem': 3, 'binarize': True},
+    # Camera photos: large, unevenly lit, sometimes rotated through EXIF
+    'photo': {'psm': 3, 'oem': 3, 'binarize': False, 'max_image_side': 2500},
+    # A single column of short lines
+    'receipt': {'psm': 4, 'oem': 3, 'binarize': True},
+    # Forms and tables with scattered fields
+    'sparse': {'psm': 11, 'oem': 3, 'binarize': True},
+    # One uniform block of text
+    'block': {'psm': 6, 'oem': 3, 'binarize': True}
+}
+
+# Blank page detection looks at the page in square tiles of this many pixels: a tile
+# with ink is at least BLANK_TILE_CONTRAST gray levels darker than the paper on average
+BLANK_TILE_SIZE = 16
+BLANK_TILE_CONTRAST = 20
+
+
+class OCRPipeline:
+    """Preprocesses page images and runs tesseract, retrying low-confidence pages at a higher resolution"""
+    
+    def __init__(self, psm=3, oem=3, lang='eng', binarize=True, max_image_side=3500,
+                 blank_ink_tiles=3, min_confidence=70, retry_dpi=300):
+        """
+        Initialize the pipeline
+        
+        Args:
+            psm: Tesseract page segmentation mode
+            oem: Tesseract OCR engine mode
+            lang: Tesseract language(s), e.g. 'eng' or 'eng+deu'
+            binarize: Threshold the grayscale image (Otsu) before OCR
+            max_image_side: Images with a longer side are downsampled first (None = never)
+            blank_ink_tiles: Pages with fewer tiles containing ink are skipped as blank
+                (0 = never skip)
+            min_confidence: Mean word confidence (0-100) below which a page is retried
+            retry_dpi: Resolution PDF pages are re-rendered at for the retry (0 = no retry)
+        """
+        self.psm = psm
+        self.oem = oem
+        self.lang = lang
+        self.binarize = binarize
+        self.max_image_side = max_image_side
+        self.blank_ink_tiles = blank_ink_tiles
+        self.min_confidence = min_confidence
+        self.retry_dpi = retry_dpi
+    
+    @classmethod
+    def from_profile(cls, name, **overrides):
+        """
+        Create a pipeline from one of the OCR_PROFILES
+        
+        Args:
+            name: Profile name
+            **overrides: Settings that replace the profile's values
+            
+        Returns:
+            OCRPipeline: The configured pipeline
+        """
+        if name not in OCR_PROFILES:
+            raise ValueError(f"Unknown OCR profile: {name}")
+        
+        settings = dict(OCR_PROFILES[name])
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(**settings)
+    
+    @property
+    def tesseract_config(self):
+        return f'--psm {self.psm} --oem {self.oem}'
+    
+    def ocr_image(self, image, rerender=None):
+        """
+        OCR a page image
+        
+        The image is converted to grayscale, downsampled if it is very large and
+        optionally binarized. Blank pages are skipped without calling tesseract;
+        that is decided on the grayscale image, because binarizing a noisy blank
+        scan turns half of its paper into "ink".
+        When the mean word confidence is below min_confidence the page is OCRed
+        again from rerender() (or from the full-size image if it was downsampled)
+        and the more confident result is kept.
+        
+        Args:
+            image: PIL image of the page
+            rerender: Optional callable returning a higher resolution image of the page
+            
+        Returns:
+            dict: text, confidence, blank and retried
+        """
+        gray, downsampled = self._grayscale(image)
+        
+        if self.is_blank(gray):
+            return {'text': '', 'confidence': None, 'blank': True, 'retried': False}
+        
+        text, confidence = self.recognize(self._binarize(gray))
+        result = {'text': text, 'confidence': confidence, 'blank': False, 'retried': False}
+        
+        if confidence >= self.min_confidence:
+            return result
+        
+        # Low confidence: try again with more pixels
+        if rerender is not None:
+            retry_image = rerender()
+            if retry_image is None:
+                return result
+            retry_image, _ = self.preprocess(retry_image, downsample=False)
+        elif downsampled:
+            retry_image, _ = self.preprocess(image, downsample=False)
+        else:
+            return result
+        
+        retry_text, retry_confidence = self.recognize(retry_image)
+        if retry_confidence > confidence:
+            result.update(text=retry_text, confidence=retry_confidence)
+        result['retried'] = True
+        
+        return result
+    
+    def preprocess(self, image, downsample=True):
+        """
+        Prepare an image for tesseract
+        
+        Args:
+            image: PIL image
+            downsample: Shrink images larger than max_image_side
+            
+        Returns:
+            tuple: (prepared grayscale image, whether it was downsampled)
+        """
+        image, downsampled = self._grayscale(image, downsample)
+        return self._binarize(image), downsampled
+    
+    def _grayscale(self, image, downsample=True):
+        """Return (grayscale image, whether it was downsampled)"""
+        # Apply the camera's rotation and drop colour
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('L')
+        
+        downsampled = False
+        if downsample and self.max_image_side and max(image.size) > self.max_image_side:
+            scale = self.max_image_side / max(image.size)
+            image = image.resize(
+                (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+                Image.LANCZOS
+            )
+            downsampled = True
+        
+        return image, downsampled
+    
+    def _binarize(self, image):
+        """Threshold a grayscale image at its Otsu level if the pipeline binarizes"""
+        if not self.binarize:
+            return image
+        
+        threshold = _otsu_threshold(image.histogram())
+        return image.point(lambda value: 255 if value > threshold else 0)
+    
+    def is_blank(self, image):
+        """
+        Return True if a grayscale page image has (almost) no ink
+        
+        Ink is counted in tiles rather than as a share of all pixels, so a page
+        with a single short line (a date, a signature line) isn't blank, while
+        scattered specks and the grain of gray paper average out within a tile.
+        """
+        if not self.blank_ink_tiles:
+            return False
+        
+        # Box-average the page into tiles
+        factor = max(1, min(BLANK_TILE_SIZE, image.width, image.height))
+        histogram = image.reduce(factor).histogram()
+        total = sum(histogram)
+        if total == 0:
+            return True
+        
+        # The paper is the median tile
+        seen = 0
+        for paper, count in enumerate(histogram):
+            seen += count
+            if seen * 2 >= total:
+                break
+        
+        ink_tiles = sum(histogram[:max(0, paper - BLANK_TILE_CONTRAST)])
+        return ink_tiles < self.blank_ink_tiles
+    
+    def recognize(self, image):
+        """
+        Run tesseract on a prepared image
+        
+        Args:
+            image: PIL image
+            
+        Returns:
+            tuple: (text, mean word confidence from 0 to 100)
+        """
+        data = pytesseract.image_to_data(
+            image,
+            lang=self.lang,
+            config=self.tesseract_config,
+            output_type=pytesseract.Output.DICT
+        )
+        
+        lines = []
+        current_line = None
+        current_paragraph = None
+        confidences = []
+        
+        for index, word in enumerate(data['text']):
+            if not word or not word.strip():
+                continue
+            
+            confidence = float(data['conf'][index])
+            if confidence >= 0:
+                confidences.append(confidence)
+            
+            paragraph = (data['page_num'][index], data['block_num'][index], data['par_num'][index])
+            line = paragraph + (data['line_num'][index],)
+            
+            if line != current_line:
+                # Separate paragraphs with an empty line, as image_to_string does
+                if current_paragraph is not None and paragraph != current_paragraph:
+                    lines.append([])
+                lines.append([])
+                current_line = line
+                current_paragraph = paragraph
+            
+            lines[-1].append(word)
+        
+        text = '\n'.join(' '.join(words) for words in lines)
+        confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        
+        return text, confidence
+
+
+def _otsu_threshold(histogram):
+    """Return the gray level that best separates a 256-bin histogram into ink and paper"""
+    total = sum(histogram)
+    if not total:
+        return 127
+    
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background_count = 0
+    background_sum = 0
+    best_threshold = 127
+    best_variance = -1.0
+    
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+        
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+        
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+    
+    return best_threshold
\ No newline at end of file
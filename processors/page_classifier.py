@@ -0,0 +1,189 @@
+import re
+import unicodedata
+
+# Runs of letters; digits and punctuation don't say much about text layer quality
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+# Glyphs without a Unicode mapping, as printed by some PDF text extractors
+CID_PATTERN = re.compile(r'\(cid:\d+\)')
+VOWELS = set('aeiouy')
+
+# Bump when a change to classify() changes decisions, so the decisions saved for
+# earlier uploads are made again when the files are reprocessed
+CLASSIFIER_VERSION = 1
+
+
+class PageClassifier:
+    """Decides per PDF page whether its text layer can be used or the page needs OCR"""
+    
+    def __init__(self, min_quality=0.6, short_text_chars=50, scan_image_dpi=100, vector_content_bytes=20000):
+        """
+        Initialize the classifier
+        
+        Args:
+            min_quality: Text layers scoring lower (0-1, see text_quality) are OCRed
+            short_text_chars: Text layers shorter than this over a full-page image are
+                treated as scanner stamps and the page is OCRed
+            scan_image_dpi: Minimum resolution an image needs, stretched over the
+                whole page, to count as a scan of the page
+            vector_content_bytes: Pages without text, fonts or images but with a
+                content stream this large are OCRed (text drawn as outlines)
+        """
+        self.min_quality = min_quality
+        self.short_text_chars = short_text_chars
+        self.scan_image_dpi = scan_image_dpi
+        self.vector_content_bytes = vector_content_bytes
+    
+    @property
+    def settings_key(self):
+        """Identifies the classifier version and thresholds a decision was made with"""
+        return (
+            f'v{CLASSIFIER_VERSION}:{self.min_quality}:{self.short_text_chars}:'
+            f'{self.scan_image_dpi}:{self.vector_content_bytes}'
+        )
+    
+    def classify(self, page, text):
+        """
+        Classify a page from its resources and extracted text layer
+        
+        Args:
+            page: PyPDF2 page object
+            text: Text extracted from the page's text layer (may be None)
+            
+        Returns:
+            tuple: (extraction_method, reason) with extraction_method 'native' or 'ocr'
+        """
+        text = (text or '').strip()
+        resources = inspect_resources(page)
+        
+        if not text:
+            if resources['image_pixels']:
+                return 'ocr', 'no text layer, page has images'
+            if not resources['font_count'] and _content_length(page) >= self.vector_content_bytes:
+                return 'ocr', 'no text layer, large vector content'
+            return 'native', 'blank page'
+        
+        quality = text_quality(text)
+        if quality < self.min_quality:
+            return 'ocr', f'text layer quality {quality:.2f}'
+        
+        if len(text) < self.short_text_chars and self._is_scan(page, resources):
+            return 'ocr', 'short text layer over a full-page image'
+        
+        return 'native', f'text layer quality {quality:.2f}'
+    
+    def _is_scan(self, page, resources):
+        """Return True if the page's largest image has enough pixels to be a scan of the page"""
+        if not resources['image_pixels']:
+            return False
+        
+        try:
+            width_inches = float(page.mediabox.width) / 72
+            height_inches = float(page.mediabox.height) / 72
+        except Exception:
+            return False
+        
+        return resources['image_pixels'] >= width_inches * height_inches * self.scan_image_dpi ** 2
+
+
+def text_quality(text):
+    """
+    Score how much a text layer looks like real text
+    
+    Unmapped glyphs, control and private-use characters lower the score, as do
+    letter runs that can't be words: very long runs (missing spaces) and runs
+    longer than three letters without a vowel (wrong font encodings).
+    
+    Args:
+        text: Extracted text
+        
+    Returns:
+        float: Score from 0 (garbage) to 1 (plausible text)
+    """
+    text = CID_PATTERN.sub('�', text)
+    characters = [c for c in text if not c.isspace()]
+    if not characters:
+        return 0.0
+    
+    bad_characters = sum(
+        1 for c in characters
+        if c == '�' or unicodedata.category(c) in ('Cc', 'Co', 'Cn', 'Cs')
+    )
+    character_score = 1 - bad_characters / len(characters)
+    
+    words = WORD_PATTERN.findall(text)
+    if not words:
+        # Numbers and punctuation only, e.g. a table of figures
+        return character_score
+    
+    plausible = sum(1 for word in words if _plausible_word(word))
+    return character_score * plausible / len(words)
+
+
+def inspect_resources(page, max_depth=2):
+    """
+    Count the fonts and find the largest image used by a page, including nested forms
+    
+    Args:
+        page: PyPDF2 page object
+        max_depth: How many levels of form XObjects to look into
+        
+    Returns:
+        dict: font_count, image_count and image_pixels (of the largest image)
+    """
+    summary = {'font_count': 0, 'image_count': 0, 'image_pixels': 0}
+    
+    try:
+        _inspect_resource_dict(page.get('/Resources'), summary, max_depth)
+    except Exception as e:
+        print(f"Warning: Could not read page resources: {str(e)}")
+    
+    return summary
+
+
+def _inspect_resource_dict(resources, summary, depth):
+    """Add the fonts and images of a resource dictionary to the summary"""
+    resources = _resolve(resources)
+    if not resources:
+        return
+    
+    fonts = _resolve(resources.get('/Font'))
+    if fonts:
+        summary['font_count'] += len(fonts)
+    
+    xobjects = _resolve(resources.get('/XObject'))
+    if not xobjects:
+        return
+    
+    for reference in xobjects.values():
+        xobject = _resolve(reference)
+        subtype = xobject.get('/Subtype')
+        
+        if subtype == '/Image':
+            summary['image_count'] += 1
+            pixels = int(xobject.get('/Width', 0)) * int(xobject.get('/Height', 0))
+            summary['image_pixels'] = max(summary['image_pixels'], pixels)
+        elif subtype == '/Form' and depth > 0:
+            _inspect_resource_dict(xobject.get('/Resources'), summary, depth - 1)
+
+
+def _resolve(value):
+    """Follow an indirect PDF reference"""
+    return value.get_object() if hasattr(value, 'get_object') else value
+
+
+def _content_length(page):
+    """Return the size of a page's decoded content stream in bytes"""
+    try:
+        contents = page.get_contents()
+        return len(contents.get_data()) if contents is not None else 0
+    except Exception:
+        return 0
+
+
+def _plausible_word(word):
+    """Return True if a run of letters could be a word in a language with vowels"""
+    if len(word) > 25:
+        return False
+    if len(word) <= 3 or not word.isascii():
+        return True
+    return any(c in VOWELS for c in word.lower())
\ No newline at end of file
@@ -1,83 +1,329 @@
 import os
 import io
+import tempfile
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import PyPDF2
 import pdf2image
-import pytesseract
 from PIL import Image
 
+from processors.ocr_pipeline import OCRPipeline
+from processors.page_classifier import PageClassifier
+from processors.pdf_text_engines import PyPDF2TextEngine, get_text_engine
+
 
 class PDFProcessor:
     """Processor for PDF files"""
     
+    def __init__(self, ocr_workers=1, max_inflight_pages=None, ocr_dpi=200, max_render_gap=2,
+                 page_window=64, ocr_pipeline=None, page_classifier=None, text_engine='pypdf2'):
+        """
+        Initialize the PDF processor
+        
+        Args:
+            ocr_workers: Number of processes used to OCR pages in parallel (1 = serial)
+            max_inflight_pages: Maximum number of pages rendered/OCRed at once,
+                defaults to twice the number of workers
+            ocr_dpi: Resolution used when rendering pages for OCR; pages the
+                pipeline isn't confident about are re-rendered at its retry_dpi
+            max_render_gap: Number of text pages between two OCR pages that may
+                be rendered anyway to keep them in one poppler call
+            page_window: Number of pages extracted and OCRed before they are yielded
+            ocr_pipeline: OCRPipeline used for scanned pages (defaults to the document profile)
+            page_classifier: PageClassifier deciding which pages need OCR
+            text_engine: Library reading the text layer: 'pypdf2', 'pdfminer',
+                'pypdfium2', 'pdftotext' or 'auto' (see processors.pdf_text_engines)
+        """
+        self.ocr_workers = max(1, ocr_workers or 1)
+        self.max_inflight_pages = max_inflight_pages or self.ocr_workers * 2
+        self.ocr_dpi = ocr_dpi
+        self.max_render_gap = max_render_gap
+        self.page_window = max(1, page_window)
+        self.ocr_pipeline = ocr_pipeline or OCRPipeline.from_profile('document')
+        self.page_classifier = page_classifier or PageClassifier()
+        self.text_engine = get_text_engine(text_engine)
+    
     def can_process(self, file_extension):
         """Check if this processor can handle the given file extension"""
         return file_extension.lower() == 'pdf'
     
-    def extract_text(self, file_path):
+    @property
+    def classification_key(self):
+        """Identifies the settings page decisions depend on; saved decisions made with others are ignored"""
+        return f'{self.text_engine.name}:{self.page_classifier.settings_key}'
+    
+    def extract_text(self, file_path, progress_callback=None):
         """
         Extract text from a PDF file, using OCR if needed
         
         Args:
             file_path: Path to the PDF file
+            progress_callback: Optional callable(processed_pages, total_pages)
             
         Returns:
             dict: A dictionary mapping page numbers to text content
         """
-        # Open the PDF file
-        pages = {}
+        return dict(self.iter_pages(file_path, progress_callback=progress_callback))
+    
+    def iter_pages(self, file_path, progress_callback=None, page_methods=None):
+        """
+        Yield the text of each page of a PDF file, using OCR if needed
+        
+        Pages are read in windows of page_window pages: the text layer of the
+        window is read, its scanned pages are OCRed together and the window is
+        yielded in page order, so only one window of text is held at a time.
+        A page that fails to extract is yielded as an empty string.
         
+        Whether a page is OCRed is decided by the page classifier, unless
+        page_methods already holds a decision from an earlier run of the same
+        file; pages classified as OCR then skip the text layer entirely.
+        
+        Args:
+            file_path: Path to the PDF file
+            progress_callback: Optional callable(processed_pages, total_pages)
+            page_methods: Optional dict of page_number -> {'method', 'reason'};
+                known decisions are reused and new ones are added to it
+                
+        Yields:
+            tuple: (page_number, text) with 1-based page numbers
+        """
+        file = None
         try:
-            with open(file_path, 'rb') as file:
-                # Create a PDF reader object
-                pdf_reader = PyPDF2.PdfReader(file)
+            file = open(file_path, 'rb')
+            # Create a PDF reader object
+            pdf_reader = PyPDF2.PdfReader(file)
+            total_pages = len(pdf_reader.pages)
+        except Exception as e:
+            if file:
+                file.close()
+            raise Exception(f"Failed to process PDF: {str(e)}")
+        
+        processed_pages = 0
+        if page_methods is None:
+            page_methods = {}
+        
+        with file, closing(self._open_text_engine(file_path, pdf_reader)) as text_engine:
+            for window_start in range(0, total_pages, self.page_window):
+                window = {}
+                ocr_pages = []
                 
-                # Process each page
-                for page_num in range(len(pdf_reader.pages)):
-                    # Try to extract text directly first
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
+                for page_num in range(window_start, min(window_start + self.page_window, total_pages)):
+                    page_number = page_num + 1  # 1-based page numbering
+                    known = page_methods.get(page_number)
                     
-                    # If no text is extracted, try OCR
-                    if not text or len(text.strip()) < 50:  # Arbitrary threshold
-                        text = self._extract_text_with_ocr(file_path, page_num)
+                    if known and known['method'] == 'ocr':
+                        # Classified as a scan on an earlier run
+                        text = None
+                        method = 'ocr'
+                    else:
+                        # Try to extract text directly first
+                        text = _extract_text_layer(text_engine, pdf_reader, page_num)
+                        
+                        if known:
+                            method = known['method']
+                        else:
+                            method, reason = self._classify(pdf_reader, page_num, text)
+                            page_methods[page_number] = {'method': method, 'reason': reason}
                     
-                    # Store the extracted text
-                    pages[page_num + 1] = text  # 1-based page numbering
-        
+                    if method == 'ocr':
+                        ocr_pages.append(page_num)
+                        text = None
+                    else:
+                        processed_pages += 1
+                        if progress_callback:
+                            progress_callback(processed_pages, total_pages)
+                    
+                    # Keep the page's slot so the window is yielded in order
+                    window[page_number] = text
+                
+                # OCR the pages without a usable text layer
+                for page_num, text in self._extract_pages_with_ocr(file_path, ocr_pages):
+                    window[page_num + 1] = text
+                    processed_pages += 1
+                    if progress_callback:
+                        progress_callback(processed_pages, total_pages)
+                
+                for page_number, text in window.items():
+                    yield page_number, text or ""
+    
+    def _open_text_engine(self, file_path, pdf_reader):
+        """Open the configured text engine on a PDF, falling back to PyPDF2 if it can't read the file"""
+        try:
+            return self.text_engine(file_path, pdf_reader)
         except Exception as e:
-            raise Exception(f"Failed to process PDF: {str(e)}")
-        
-        return pages
+            print(f"Warning: {self.text_engine.name} could not open the PDF, using PyPDF2: {str(e)}")
+            return PyPDF2TextEngine(file_path, pdf_reader)
+    
+    def _classify(self, pdf_reader, page_num, text):
+        """Return (method, reason) for a page, falling back to the text length if classification fails"""
+        try:
+            return self.page_classifier.classify(pdf_reader.pages[page_num], text)
+        except Exception as e:
+            print(f"Page classification failed on page {page_num+1}: {str(e)}")
+            if not text or len(text.strip()) < 50:
+                return 'ocr', 'classification failed, short text layer'
+            return 'native', 'classification failed'
     
-    def _extract_text_with_ocr(self, pdf_path, page_num):
+    def _extract_pages_with_ocr(self, pdf_path, page_nums):
         """
-        Extract text from a PDF page using OCR
+        OCR several pages, in parallel when more than one worker is configured
         
         Args:
             pdf_path: Path to the PDF file
-            page_num: Page number to process (0-based)
+            page_nums: Page numbers to process (0-based)
             
-        Returns:
-            str: Extracted text
+        Yields:
+            tuple: (page_num, text) as each page completes
         """
-        try:
-            # Convert PDF page to image
-            images = pdf2image.convert_from_path(
-                pdf_path, 
-                first_page=page_num+1, 
-                last_page=page_num+1,
-                dpi=300
-            )
+        if not page_nums:
+            return
+        
+        # Pages are rendered to disk in batches, so only the OCR step holds images in memory
+        with tempfile.TemporaryDirectory(prefix='pdf_ocr_') as output_dir:
+            rendered_pages = self._render_pages_for_ocr(pdf_path, page_nums, output_dir)
             
-            if not images:
-                return ""
+            if self.ocr_workers == 1 or len(page_nums) < 2:
+                for page_num, image_path in rendered_pages:
+                    yield _ocr_image_file(page_num, image_path, self.ocr_pipeline, pdf_path)
+                return
             
-            # Apply OCR to the image
-            image = images[0]
-            text = pytesseract.image_to_string(image)
+            # Bounding the submitted futures also bounds the number of page images in memory
+            with ProcessPoolExecutor(max_workers=self.ocr_workers) as executor:
+                pending = set()
+                
+                for page_num, image_path in rendered_pages:
+                    pending.add(executor.submit(_ocr_image_file, page_num, image_path, self.ocr_pipeline, pdf_path))
+                    
+                    if len(pending) >= self.max_inflight_pages:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                
+                for future in pending:
+                    yield future.result()
+    
+    def _render_pages_for_ocr(self, pdf_path, page_nums, output_dir):
+        """
+        Render the pages that need OCR to image files
+        
+        Pages are grouped into ranges so poppler opens the PDF once per range
+        instead of once per page. A range holds at most max_inflight_pages pages,
+        so the next range is rendered while the previous one is OCRed and only
+        a few ranges of images are on disk at a time.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            page_nums: Page numbers to render (0-based)
+            output_dir: Directory to write the page images to
             
-            return text
+        Yields:
+            tuple: (page_num, image_path), image_path is None if rendering failed
+        """
+        wanted = set(page_nums)
         
-        except Exception as e:
-            print(f"OCR failed on page {page_num+1}: {str(e)}")
-            return ""
\ No newline at end of file
+        for first, last in _plan_render_ranges(page_nums, self.max_render_gap, self.max_inflight_pages):
+            try:
+                image_paths = pdf2image.convert_from_path(
+                    pdf_path,
+                    first_page=first+1,
+                    last_page=last+1,
+                    dpi=self.ocr_dpi,
+                    output_folder=output_dir,
+                    output_file=f'page{first+1}_',
+                    fmt='png',
+                    grayscale=True,
+                    paths_only=True,
+                    thread_count=self.ocr_workers
+                )
+            except Exception as e:
+                print(f"Rendering failed for pages {first+1}-{last+1}: {str(e)}")
+                image_paths = []
+            
+            for offset, page_num in enumerate(range(first, last + 1)):
+                image_path = image_paths[offset] if offset < len(image_paths) else None
+                
+                if page_num in wanted:
+                    yield page_num, image_path
+                elif image_path:
+                    # Rendered only to keep the range contiguous
+                    os.remove(image_path)
+
+
+def _plan_render_ranges(page_nums, max_gap, max_pages):
+    """
+    Group sorted page numbers into (first, last) ranges of at most max_pages pages
+    
+    Pages separated by at most max_gap unneeded pages share a range, trading a
+    few extra rendered pages for fewer poppler invocations.
+    """
+    ranges = []
+    for page_num in sorted(page_nums):
+        if ranges and page_num - ranges[-1][1] - 1 <= max_gap and page_num - ranges[-1][0] < max_pages:
+            ranges[-1][1] = page_num
+        else:
+            ranges.append([page_num, page_num])
+    return [tuple(r) for r in ranges]
+
+
+def _extract_text_layer(text_engine, pdf_reader, page_num):
+    """Return the embedded text of a page, or None if it can't be read"""
+    try:
+        return text_engine.page_text(page_num)
+    except Exception as e:
+        print(f"Text extraction with {text_engine.name} failed on page {page_num+1}: {str(e)}")
+    
+    if isinstance(text_engine, PyPDF2TextEngine):
+        return None
+    
+    # Give PyPDF2 a try before falling back to OCR
+    try:
+        return pdf_reader.pages[page_num].extract_text()
+    except Exception as e:
+        print(f"Text extraction failed on page {page_num+1}: {str(e)}")
+        return None
+
+
+def _ocr_image_file(page_num, image_path, ocr_pipeline, pdf_path):
+    """
+    OCR a rendered page image and remove it afterwards
+    
+    Defined at module level so it can be sent to worker processes.
+    
+    Args:
+        page_num: Page number the image belongs to (0-based)
+        image_path: Path to the rendered page image
+        ocr_pipeline: OCRPipeline to preprocess and recognize the page with
+        pdf_path: Path to the PDF, used to re-render low-confidence pages
+        
+    Returns:
+        tuple: (page_num, extracted text)
+    """
+    if not image_path:
+        return page_num, ""
+    
+    def rerender():
+        images = pdf2image.convert_from_path(
+            pdf_path,
+            first_page=page_num+1,
+            last_page=page_num+1,
+            dpi=ocr_pipeline.retry_dpi,
+            grayscale=True
+        )
+        return images[0] if images else None
+    
+    try:
+        # Apply OCR to the image
+        with Image.open(image_path) as image:
+            result = ocr_pipeline.ocr_image(image, rerender=rerender if ocr_pipeline.retry_dpi else None)
+        
+        return page_num, result['text']
+    
+    except Exception as e:
+        print(f"OCR failed on page {page_num+1}: {str(e)}")
+        return page_num, ""
+    
+    finally:
+        try:
+            os.remove(image_path)
+        except OSError:
+            pass
\ No newline at end of file
@@ -0,0 +1,208 @@
+import io
+import shutil
+import subprocess
+import importlib.util
+
+
+class PyPDF2TextEngine:
+    """PyPDF2's pure-Python text extraction, always available"""
+    
+    name = 'pypdf2'
+    
+    @classmethod
+    def available(cls):
+        return True
+    
+    def __init__(self, file_path, pdf_reader):
+        """Use the PyPDF2 reader PDFProcessor already opened"""
+        self.pdf_reader = pdf_reader
+    
+    def page_text(self, page_num):
+        """Return the text layer of a page (0-based)"""
+        return self.pdf_reader.pages[page_num].extract_text()
+    
+    def close(self):
+        pass
+
+
+class PdfminerTextEngine:
+    """pdfminer.six layout analysis; slower than pdfium but keeps reading order well"""
+    
+    name = 'pdfminer'
+    
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('pdfminer') is not None
+    
+    def __init__(self, file_path, pdf_reader):
+        """Open the file; pages are parsed in order as they are requested"""
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFResourceManager
+        
+        self.file = open(file_path, 'rb')
+        self.resource_manager = PDFResourceManager(caching=True)
+        self.laparams = LAParams()
+        self._pages = None
+        self._next_page_num = 0
+    
+    def page_text(self, page_num):
+        """Return the text layer of a page (0-based)"""
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        
+        # pdfminer walks the page tree front to back; start over to go backwards
+        if self._pages is None or page_num < self._next_page_num:
+            self.file.seek(0)
+            self._pages = PDFPage.get_pages(self.file)
+            self._next_page_num = 0
+        
+        for page in self._pages:
+            index = self._next_page_num
+            self._next_page_num += 1
+            if index < page_num:
+                continue
+            
+            output = io.StringIO()
+            device = TextConverter(self.resource_manager, output, laparams=self.laparams)
+            try:
+                PDFPageInterpreter(self.resource_manager, device).process_page(page)
+            finally:
+                device.close()
+            # TextConverter ends every page with a form feed
+            return output.getvalue().replace('\f', '')
+        
+        return None
+    
+    def close(self):
+        self.file.close()
+
+
+class PdfiumTextEngine:
+    """pypdfium2, bindings to Chrome's PDF library; the fastest engine"""
+    
+    name = 'pypdfium2'
+    
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec('pypdfium2') is not None
+    
+    def __init__(self, file_path, pdf_reader):
+        """Open the file with pdfium"""
+        import pypdfium2
+        
+        self.pdf = pypdfium2.PdfDocument(file_path)
+    
+    def page_text(self, page_num):
+        """Return the text layer of a page (0-based)"""
+        page = self.pdf[page_num]
+        try:
+            text_page = page.get_textpage()
+            try:
+                return text_page.get_text_range()
+            finally:
+                text_page.close()
+        finally:
+            page.close()
+    
+    def close(self):
+        self.pdf.close()
+
+
+class PdftotextTextEngine:
+    """Poppler's pdftotext command, run once per batch of pages"""
+    
+    name = 'pdftotext'
+    
+    @classmethod
+    def available(cls):
+        return shutil.which('pdftotext') is not None
+    
+    def __init__(self, file_path, pdf_reader, batch_pages=32, timeout=120):
+        """
+        Remember the file; pdftotext is started when a page is requested
+        
+        Args:
+            file_path: Path to the PDF file
+            pdf_reader: PyPDF2 reader, used for the page count
+            batch_pages: Number of pages converted per pdftotext call
+            timeout: Seconds one pdftotext call may take
+        """
+        self.file_path = file_path
+        self.total_pages = len(pdf_reader.pages)
+        self.batch_pages = batch_pages
+        self.timeout = timeout
+        self._texts = {}
+        self._failed_pages = range(0)
+        self._failure = None
+    
+    def page_text(self, page_num):
+        """Return the text layer of a page (0-based)"""
+        # The pages of a batch pdftotext failed on are not converted again; each
+        # raises the same error so the caller falls back to PyPDF2 without waiting
+        if page_num in self._failed_pages:
+            first, last = self._failed_pages.start + 1, self._failed_pages.stop
+            raise RuntimeError(f"pdftotext failed on pages {first}-{last}: {self._failure}")
+        
+        if page_num not in self._texts:
+            # Only the current batch is kept
+            last = min(page_num + self.batch_pages, self.total_pages) - 1
+            try:
+                self._texts = self._convert(page_num, last)
+            except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+                self._texts = {}
+                self._failed_pages = range(page_num, last + 1)
+                self._failure = e
+                raise
+        return self._texts.get(page_num)
+    
+    def _convert(self, first, last):
+        """Run pdftotext on a page range and return {page_num: text}"""
+        result = subprocess.run(
+            ['pdftotext', '-enc', 'UTF-8', '-f', str(first + 1), '-l', str(last + 1), self.file_path, '-'],
+            capture_output=True,
+            check=True,
+            timeout=self.timeout
+        )
+        # Pages are separated by form feeds
+        texts = result.stdout.decode('utf-8', errors='replace').split('\f')
+        return {first + offset: text for offset, text in enumerate(texts[:last - first + 1])}
+    
+    def close(self):
+        self._texts = {}
+        self._failed_pages = range(0)
+
+
+PDF_TEXT_ENGINES = {
+    engine.name: engine
+    for engine in (PyPDF2TextEngine, PdfminerTextEngine, PdfiumTextEngine, PdftotextTextEngine)
+}
+
+# Engines tried by 'auto', fastest first
+AUTO_ENGINE_ORDER = ('pypdfium2', 'pdftotext', 'pypdf2')
+
+
+def get_text_engine(name):
+    """
+    Return the text engine class for a configured name
+    
+    Args:
+        name: An engine name from PDF_TEXT_ENGINES, or 'auto' for the fastest installed one
+        
+    Returns:
+        type: The engine class; PyPDF2 if the requested engine isn't installed
+    """
+    if name == 'auto':
+        for engine_name in AUTO_ENGINE_ORDER:
+            if PDF_TEXT_ENGINES[engine_name].available():
+                return PDF_TEXT_ENGINES[engine_name]
+    
+    if name not in PDF_TEXT_ENGINES:
+        raise ValueError(f"Unknown PDF text engine: {name}")
+    
+    engine = PDF_TEXT_ENGINES[name]
+    if not engine.available():
+        print(f"Warning: PDF text engine '{name}' is not installed, using PyPDF2")
+        return PyPDF2TextEngine
+    
+    return engine
\ No newline at end of file
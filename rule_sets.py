@@ -0,0 +1,75 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models import RuleSet, ExtractionRule
+from processors.document_processor import hash_file
+
+
+class RuleSetStore:
+    """Saves uploaded rule sheets once and reuses them when the same sheet comes back"""
+    
+    def __init__(self, pattern_extractor):
+        """Initialize with the extractor used to parse rule sheets"""
+        self.pattern_extractor = pattern_extractor
+    
+    def get_or_create(self, excel_path, name):
+        """
+        Return the rule set stored for a sheet, saving it on first upload
+        
+        Args:
+            excel_path: Path to the uploaded Excel file
+            name: Original filename, used to number versions of the same sheet
+            
+        Returns:
+            RuleSet: The stored rule set, or None if the sheet has no valid rules
+        """
+        content_hash = hash_file(excel_path)
+        
+        # An identical sheet was uploaded before: skip parsing it again
+        rule_set = RuleSet.query.filter_by(content_hash=content_hash).first()
+        if rule_set:
+            return rule_set
+        
+        rules = self.pattern_extractor.load_rules_from_excel(excel_path)
+        if not rules:
+            return None
+        
+        latest_version = db.session.query(db.func.max(RuleSet.version)).filter_by(name=name).scalar()
+        rule_set = RuleSet(
+            name=name,
+            version=(latest_version or 0) + 1,
+            content_hash=content_hash,
+            rule_count=len(rules)
+        )
+        db.session.add(rule_set)
+        
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # The same sheet was saved by a concurrent upload
+            db.session.rollback()
+            return RuleSet.query.filter_by(content_hash=content_hash).first()
+        
+        # Save the rules in one insert
+        db.session.execute(insert(ExtractionRule), [
+            {
+                'rule_set_id': rule_set.id,
+                'position': position,
+                'name': rule['field_name'],
+                'pattern': rule['search_pattern'],
+                'extraction_type': rule['extraction_type'],
+                'context': rule['context_before'] + ' | ' + rule['context_after'],
+                'context_before': rule['context_before'],
+                'context_after': rule['context_after'],
+                'instructions': rule['instructions']
+            }
+            for position, rule in enumerate(rules)
+        ])
+        db.session.commit()
+        
+        return rule_set
+    
+    def recent(self, limit=50):
+        """Return the most recently saved rule sets"""
+        return RuleSet.query.order_by(RuleSet.created_at.desc(), RuleSet.id.desc()).limit(limit).all()
\ No newline at end of file
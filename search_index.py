@@ -0,0 +1,224 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import text, bindparam
+from sqlalchemy.exc import OperationalError
+
+from database import db
+
+
+# Snippet delimiters that are unlikely to appear in documents; replaced with <mark> when rendering
+SNIPPET_START = '⦃'
+SNIPPET_END = '⦄'
+
+# Runs of characters the FTS tokenizers treat as part of a word
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+class PageSearchIndex:
+    """Full-text index over page content: SQLite FTS5, or a tsvector column on PostgreSQL"""
+    
+    def __init__(self):
+        """Initialize the index; call ensure_schema inside an app context before use"""
+        self.enabled = False
+    
+    @property
+    def dialect(self):
+        return db.engine.dialect.name
+    
+    def ensure_schema(self):
+        """
+        Create the index and the hooks that keep it in sync on ingest
+        
+        On SQLite an external-content FTS5 table is kept up to date by triggers on
+        pages, so bulk inserts are indexed without extra work. On PostgreSQL a stored
+        generated tsvector column with a GIN index does the same.
+        """
+        try:
+            if self.dialect == 'sqlite':
+                exists = db.session.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages_fts'"
+                )).first()
+                
+                db.session.execute(text(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts "
+                    "USING fts5(content, content='pages', content_rowid='id')"
+                ))
+                db.session.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS pages_fts_insert AFTER INSERT ON pages BEGIN "
+                    "INSERT INTO pages_fts(rowid, content) VALUES (new.id, new.content); END"
+                ))
+                db.session.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS pages_fts_delete AFTER DELETE ON pages BEGIN "
+                    "INSERT INTO pages_fts(pages_fts, rowid, content) VALUES ('delete', old.id, old.content); END"
+                ))
+                db.session.execute(text(
+                    "CREATE TRIGGER IF NOT EXISTS pages_fts_update AFTER UPDATE OF content ON pages BEGIN "
+                    "INSERT INTO pages_fts(pages_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+                    "INSERT INTO pages_fts(rowid, content) VALUES (new.id, new.content); END"
+                ))
+                
+                # Index pages stored before the index existed
+                if not exists:
+                    db.session.execute(text("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')"))
+            
+            elif self.dialect == 'postgresql':
+                db.session.execute(text(
+                    "ALTER TABLE pages ADD COLUMN IF NOT EXISTS content_tsv tsvector "
+                    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED"
+                ))
+                db.session.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_pages_content_tsv ON pages USING GIN (content_tsv)"
+                ))
+            
+            else:
+                return
+            
+            db.session.commit()
+            self.enabled = True
+        
+        except OperationalError as e:
+            db.session.rollback()
+            print(f"Warning: Full-text search is not available: {str(e)}")
+    
+    def search(self, query, page=1, per_page=20):
+        """
+        Search page content
+        
+        Args:
+            query: User search terms
+            page: 1-based page of hits to return
+            per_page: Number of hits per page
+            
+        Returns:
+            tuple: (hits, total) where each hit is a dict with page_id, document_id,
+                page_number, filename, snippet (Markup) and score
+        """
+        if not self.enabled or not query.strip():
+            return [], 0
+        
+        params = {'limit': per_page, 'offset': (max(page, 1) - 1) * per_page}
+        
+        if self.dialect == 'sqlite':
+            params['query'] = _fts5_query(query)
+            if not params['query']:
+                return [], 0
+            
+            total = db.session.execute(text(
+                "SELECT count(*) FROM pages_fts "
+                "JOIN pages p ON p.id = pages_fts.rowid "
+                "JOIN documents d ON d.id = p.document_id "
+                "WHERE pages_fts MATCH :query AND d.page_count > 0"
+            ), params).scalar()
+            
+            rows = db.session.execute(text(
+                "SELECT p.id, p.document_id, p.page_number, d.filename, "
+                f"snippet(pages_fts, 0, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) AS snippet, "
+                "bm25(pages_fts) AS score "
+                "FROM pages_fts "
+                "JOIN pages p ON p.id = pages_fts.rowid "
+                "JOIN documents d ON d.id = p.document_id "
+                "WHERE pages_fts MATCH :query AND d.page_count > 0 "
+                "ORDER BY score LIMIT :limit OFFSET :offset"
+            ), params)
+        
+        else:
+            params['query'] = query
+            
+            total = db.session.execute(text(
+                "SELECT count(*) FROM pages p JOIN documents d ON d.id = p.document_id "
+                "WHERE p.content_tsv @@ websearch_to_tsquery('english', :query) AND d.page_count > 0"
+            ), params).scalar()
+            
+            rows = db.session.execute(text(
+                "SELECT p.id, p.document_id, p.page_number, d.filename, "
+                "ts_headline('english', p.content, q, "
+                f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxFragments=2') AS snippet, "
+                "ts_rank(p.content_tsv, q) AS score "
+                "FROM pages p "
+                "JOIN documents d ON d.id = p.document_id, "
+                "websearch_to_tsquery('english', :query) q "
+                "WHERE p.content_tsv @@ q AND d.page_count > 0 "
+                "ORDER BY score DESC LIMIT :limit OFFSET :offset"
+            ), params)
+        
+        hits = [
+            {
+                'page_id': row.id,
+                'document_id': row.document_id,
+                'page_number': row.page_number,
+                'filename': row.filename,
+                'snippet': _highlight(row.snippet),
+                'score': row.score
+            }
+            for row in rows
+        ]
+        
+        return hits, total
+    
+    def candidate_pages(self, literal, document_ids):
+        """
+        Find the pages that may contain a literal search pattern
+        
+        Only tokens that are delimited inside the literal itself are used, so the
+        candidates are a superset of the pages where str.find would succeed. Only
+        the SQLite FTS5 index tokenizes the same way; on PostgreSQL nothing is
+        filtered.
+        
+        Args:
+            literal: Literal pattern of an 'exact' or 'after_pattern' rule
+            document_ids: Documents to restrict the search to
+            
+        Returns:
+            set: (document_id, page_number) pairs, or None if the index can't narrow
+                the search for this literal
+        """
+        # The PostgreSQL parser keeps numbers like "12.50", e-mail addresses and
+        # hyphenated words as single tokens and the tsvector is stemmed, so a
+        # tsquery built from the literal can miss pages str.find would match
+        if not self.enabled or not document_ids or self.dialect != 'sqlite':
+            return None
+        
+        terms = _safe_terms(literal)
+        if not terms:
+            return None
+        
+        query = ' '.join(f'"{token}"*' if prefix else f'"{token}"' for token, prefix in terms)
+        statement = text(
+            "SELECT p.document_id, p.page_number FROM pages_fts "
+            "JOIN pages p ON p.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH :query AND p.document_id IN :document_ids"
+        )
+        statement = statement.bindparams(bindparam('document_ids', expanding=True))
+        rows = db.session.execute(statement, {'query': query, 'document_ids': list(document_ids)})
+        
+        return {(row[0], row[1]) for row in rows}
+
+
+def _fts5_query(query):
+    """Quote each user term so FTS5 operators and punctuation can't break the query"""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def _safe_terms(literal):
+    """
+    Return (token, is_prefix) pairs whose presence is implied by the literal
+    
+    A token touching the start of the literal may be the tail of a longer word in
+    the page, so it can't be used. A token touching the end can only be used as a
+    prefix. Tokens delimited on both sides must appear as whole words.
+    """
+    terms = []
+    for match in TOKEN_PATTERN.finditer(literal):
+        if match.start() == 0:
+            continue
+        terms.append((match.group(0).lower(), match.end() == len(literal)))
+    return terms
+
+
+def _highlight(snippet):
+    """Escape a snippet and turn the index delimiters into <mark> tags"""
+    return Markup(
+        str(escape(snippet or ''))
+        .replace(SNIPPET_START, '<mark>')
+        .replace(SNIPPET_END, '</mark>')
+    )
\ No newline at end of file
@@ -40,59 +40,6 @@ function togglePageContent(pageId) {
     }
 }
 
-// Export results to CSV
-function exportToCSV() {
-    const table = document.getElementById('resultsTable');
-    if (!table) return;
-    
-    // Create CSV content
-    let csv = [];
-    const rows = table.querySelectorAll('tr');
-    
-    for (let i = 0; i < rows.length; i++) {
-        const row = [], cols = rows[i].querySelectorAll('td, th');
-        
-        for (let j = 0; j < cols.length; j++) {
-            // Skip the context column (which is interactive)
-            if (j === 4 && i > 0) { 
-                const contextDiv = cols[j].querySelector('div.collapse');
-                const preEl = contextDiv ? contextDiv.querySelector('pre') : null;
-                const contextText = preEl ? preEl.textContent.trim() : '';
-                
-                // Escape quotes and handle CSV format
-                let cell = contextText.replace(/"/g, '""');
-                if (cell.includes(',') || cell.includes('"') || cell.includes('\n')) {
-                    cell = `"${cell}"`;
-                }
-                row.push(cell);
-            } else if (j !== 4 || i === 0) {
-                // Get content from regular cells
-                let cell = cols[j].innerText.trim();
-                
-                // Escape quotes and handle CSV format
-                cell = cell.replace(/"/g, '""');
-                if (cell.includes(',') || cell.includes('"') || cell.includes('\n')) {
-                    cell = `"${cell}"`;
-                }
-                row.push(cell);
-            }
-        }
-        csv.push(row.join(','));
-    }
-    
-    // Download CSV file
-    const csvContent = csv.join('\n');
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const url = URL.createObjectURL(blob);
-    const link = document.createElement('a');
-    link.setAttribute('href', url);
-    link.setAttribute('download', 'extraction_results.csv');
-    link.style.visibility = 'hidden';
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-}
-
 // Preview document before uploading
 function previewDocument() {
     const fileInput = document.getElementById('document');
@@ -131,4 +78,175 @@ function previewDocument() {
     } else {
         previewContainer.classList.add('d-none');
     }
-}
\ No newline at end of file
+}
+
+// Poll an ingestion job and redirect to the document once it is processed
+function pollJobStatus(statusUrl, documentUrlTemplate) {
+    const statusBadge = document.getElementById('jobStatus');
+    const progressBar = document.getElementById('jobProgress');
+    const pagesLabel = document.getElementById('jobPages');
+    const errorElement = document.getElementById('jobError');
+    
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(job => {
+            const percent = job.total_pages ? Math.round(100 * job.processed_pages / job.total_pages) : 0;
+            statusBadge.textContent = job.status;
+            progressBar.style.width = percent + '%';
+            progressBar.setAttribute('aria-valuenow', percent);
+            pagesLabel.textContent = job.processed_pages + ' of ' + (job.total_pages || '?') + ' pages processed';
+            
+            if (job.status === 'completed' && job.document_id) {
+                window.location.href = documentUrlTemplate.replace(/0$/, job.document_id);
+            } else if (job.status === 'failed') {
+                progressBar.classList.remove('progress-bar-animated');
+                progressBar.classList.add('bg-danger');
+                errorElement.textContent = job.error || 'Processing failed';
+                errorElement.classList.remove('d-none');
+            } else {
+                setTimeout(() => pollJobStatus(statusUrl, documentUrlTemplate), 2000);
+            }
+        })
+        .catch(() => setTimeout(() => pollJobStatus(statusUrl, documentUrlTemplate), 5000));
+}
+
+
+// Poll an extraction run and reload the results page when it finishes
+function pollRunStatus(statusUrl) {
+    fetch(statusUrl)
+        .then(response => response.json())
+        .then(run => {
+            const processedElement = document.getElementById('runProcessed');
+            if (processedElement) {
+                processedElement.textContent = run.processed_documents;
+            }
+            
+            if (run.status === 'completed' || run.status === 'failed') {
+                window.location.reload();
+            } else {
+                setTimeout(() => pollRunStatus(statusUrl), 2000);
+            }
+        })
+        .catch(() => setTimeout(() => pollRunStatus(statusUrl), 5000));
+}
+
+
+// Upload the selected file in chunks so large files aren't limited by the request size,
+// resuming from the server's offset after a failed chunk
+function initChunkedUpload(form) {
+    if (!form || !window.fetch || !window.Blob || !Blob.prototype.slice) return;
+    
+    const fileInput = form.querySelector('input[type="file"]');
+    const reprocessInput = form.querySelector('input[name="reprocess"]');
+    const progressContainer = document.getElementById('uploadProgressContainer');
+    const progressBar = document.getElementById('uploadProgress');
+    const statusLabel = document.getElementById('uploadStatus');
+    const submitButton = form.querySelector('button[type="submit"]');
+    const maxRetries = 5;
+    
+    function showProgress(sent, total) {
+        const percent = total ? Math.round(100 * sent / total) : 0;
+        progressBar.style.width = percent + '%';
+        progressBar.setAttribute('aria-valuenow', percent);
+        statusLabel.textContent = (sent / 1048576).toFixed(1) + ' of ' + (total / 1048576).toFixed(1) + ' MB uploaded';
+    }
+    
+    function fail(message) {
+        progressBar.classList.remove('progress-bar-animated');
+        progressBar.classList.add('bg-danger');
+        statusLabel.textContent = message;
+        submitButton.disabled = false;
+    }
+    
+    async function jsonOrThrow(response) {
+        const body = await response.json().catch(() => ({}));
+        if (!response.ok && response.status !== 409) {
+            throw new Error(body.error || 'Upload failed');
+        }
+        return body;
+    }
+    
+    async function sendChunks(file, upload) {
+        let offset = upload.received_bytes;
+        let retries = 0;
+        
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + upload.chunk_size);
+            try {
+                const response = await fetch(upload.upload_url + '?offset=' + offset, {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                    body: chunk
+                });
+                const state = await jsonOrThrow(response);
+                // A 409 at our own offset means an earlier attempt of this chunk is still being received
+                if (response.status === 409 && state.received_bytes === offset) {
+                    await new Promise(resolve => setTimeout(resolve, 1000));
+                }
+                // A 409 tells us where the server's copy ends, so continue from there
+                offset = state.received_bytes;
+                retries = 0;
+            } catch (error) {
+                if (++retries > maxRetries) throw error;
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                const state = await fetch(upload.upload_url).then(jsonOrThrow);
+                offset = state.received_bytes;
+            }
+            showProgress(offset, file.size);
+        }
+    }
+    
+    form.addEventListener('submit', async function(event) {
+        const file = fileInput.files && fileInput.files[0];
+        if (!file) return;
+        
+        event.preventDefault();
+        submitButton.disabled = true;
+        progressBar.classList.remove('bg-danger');
+        progressBar.classList.add('progress-bar-animated');
+        progressContainer.classList.remove('d-none');
+        showProgress(0, file.size);
+        
+        try {
+            const upload = await fetch(form.dataset.uploadUrl, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename: file.name, size: file.size })
+            }).then(jsonOrThrow);
+            
+            await sendChunks(file, upload);
+            
+            const completed = await fetch(upload.upload_url + '/complete', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ reprocess: reprocessInput ? reprocessInput.checked : false })
+            }).then(jsonOrThrow);
+            if (!completed.job_url) {
+                throw new Error(completed.error || 'Upload failed');
+            }
+            window.location.href = completed.job_url;
+        } catch (error) {
+            fail(error.message);
+        }
+    });
+}
+
+
+// Fetch the text of a page into its element the first time it is shown
+function loadPageContent(element) {
+    if (!element || element.dataset.loaded) return;
+    element.dataset.loaded = 'true';
+    
+    fetch(element.dataset.contentUrl)
+        .then(response => {
+            if (!response.ok) throw new Error('Failed to load page');
+            return response.json();
+        })
+        .then(page => {
+            element.textContent = page.content;
+        })
+        .catch(() => {
+            delete element.dataset.loaded;
+            element.textContent = 'Failed to load page content.';
+        });
+}
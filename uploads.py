@@ -0,0 +1,228 @@
+import os
+import uuid
+import fcntl
+import hashlib
+import datetime
+from werkzeug.utils import secure_filename
+
+from database import db
+from models import UploadSession
+
+
+class UploadOffsetError(Exception):
+    """Raised when a chunk doesn't start where the stored upload ends"""
+    
+    def __init__(self, received_bytes):
+        super().__init__(f"Chunk must start at offset {received_bytes}")
+        self.received_bytes = received_bytes
+
+
+class UploadBusyError(UploadOffsetError):
+    """Raised when another request is still writing a chunk of the same upload"""
+    
+    def __init__(self, received_bytes):
+        super().__init__(received_bytes)
+        self.args = (f"Another chunk is being received; resume at offset {received_bytes} when it completes",)
+
+
+class ChunkedUploadStore:
+    """Writes resumable chunked uploads straight to disk, hashing them as they arrive"""
+    
+    def __init__(self, upload_folder, read_size=64 * 1024):
+        """
+        Initialize the store
+        
+        Args:
+            upload_folder: Directory the uploaded files are written to
+            read_size: Number of bytes copied from the request stream at a time
+        """
+        self.upload_folder = upload_folder
+        self.read_size = read_size
+        # Running hashes of uploads received by this process: upload_id -> (hasher, bytes hashed)
+        self._hashers = {}
+    
+    def save(self, filename, stream):
+        """
+        Write a complete upload from a stream in one go
+        
+        Args:
+            filename: Original filename
+            stream: File-like object to read the upload from
+            
+        Returns:
+            tuple: (file_path, content_hash)
+        """
+        file_path = os.path.join(self.upload_folder, f'{uuid.uuid4().hex}_{secure_filename(filename)}')
+        hasher = hashlib.sha256()
+        
+        with open(file_path, 'wb') as file:
+            for block in iter(lambda: stream.read(self.read_size), b''):
+                file.write(block)
+                hasher.update(block)
+        
+        return file_path, hasher.hexdigest()
+    
+    def create(self, filename, total_size):
+        """
+        Start a new upload
+        
+        Args:
+            filename: Original filename
+            total_size: Size of the complete file in bytes
+            
+        Returns:
+            UploadSession: The new upload session
+        """
+        upload_id = uuid.uuid4().hex
+        filename = secure_filename(filename)
+        file_path = os.path.join(self.upload_folder, f'{upload_id}_{filename}')
+        
+        # Create the empty file so chunks can always be appended
+        open(file_path, 'wb').close()
+        
+        upload = UploadSession(
+            id=upload_id,
+            filename=filename,
+            file_path=file_path,
+            total_size=total_size,
+            received_bytes=0
+        )
+        db.session.add(upload)
+        db.session.commit()
+        
+        self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return upload
+    
+    def append(self, upload, offset, stream):
+        """
+        Append a chunk read from a stream
+        
+        The upload's file is locked while the chunk is written, so a retried
+        request overlapping the original one can't write the same bytes twice;
+        the lock is released by the OS if the process dies.
+        
+        Args:
+            upload: The UploadSession being written
+            offset: Byte offset the chunk starts at, must equal upload.received_bytes
+            stream: File-like object to read the chunk from
+            
+        Returns:
+            int: Total number of bytes received so far
+        """
+        if offset != upload.received_bytes:
+            raise UploadOffsetError(upload.received_bytes)
+        
+        with open(upload.file_path, 'r+b') as file:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadBusyError(upload.received_bytes)
+            
+            # A chunk may have been committed between the check above and taking the lock
+            db.session.refresh(upload)
+            if offset != upload.received_bytes:
+                raise UploadOffsetError(upload.received_bytes)
+            
+            hasher = self._get_hasher(upload)
+            received = upload.received_bytes
+            
+            try:
+                # Drop anything left behind by an interrupted chunk
+                file.truncate(received)
+                file.seek(received)
+                
+                for block in iter(lambda: stream.read(self.read_size), b''):
+                    if received + len(block) > upload.total_size:
+                        raise ValueError("Upload is larger than its declared size")
+                    file.write(block)
+                    hasher.update(block)
+                    received += len(block)
+                file.flush()
+            except Exception:
+                # The running hash now covers bytes that won't be kept; rebuild it next time
+                self._hashers.pop(upload.id, None)
+                raise
+            
+            # Committed before the lock is released, so the next chunk sees the new offset
+            self._hashers[upload.id] = (hasher, received)
+            upload.received_bytes = received
+            db.session.commit()
+        
+        return received
+    
+    def finish(self, upload):
+        """
+        Mark an upload as complete
+        
+        Args:
+            upload: The UploadSession to complete
+            
+        Returns:
+            str: SHA-256 of the uploaded file
+        """
+        if upload.received_bytes != upload.total_size:
+            raise ValueError(f"Upload incomplete: {upload.received_bytes} of {upload.total_size} bytes received")
+        
+        hasher = self._get_hasher(upload)
+        self._hashers.pop(upload.id, None)
+        
+        upload.content_hash = hasher.hexdigest()
+        upload.status = 'completed'
+        db.session.commit()
+        
+        return upload.content_hash
+    
+    def delete_expired(self, max_age):
+        """
+        Delete unfinished uploads that haven't received a chunk for max_age seconds
+        
+        Completed uploads are kept: their files belong to the ingestion job
+        they were queued as.
+        
+        Args:
+            max_age: Seconds since the last chunk after which an upload is abandoned
+            
+        Returns:
+            int: Number of uploads deleted
+        """
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=max_age)
+        expired = UploadSession.query.filter(
+            UploadSession.status == 'uploading',
+            db.func.coalesce(UploadSession.updated_at, UploadSession.created_at) < cutoff
+        ).all()
+        
+        for upload in expired:
+            self._hashers.pop(upload.id, None)
+            if os.path.exists(upload.file_path):
+                try:
+                    os.remove(upload.file_path)
+                except OSError as e:
+                    print(f"Warning: Could not remove expired upload {upload.file_path}: {str(e)}")
+            db.session.delete(upload)
+        
+        if expired:
+            db.session.commit()
+        
+        return len(expired)
+    
+    def _get_hasher(self, upload):
+        """
+        Return the running hash of an upload
+        
+        If an earlier chunk was received by another worker process (or before a
+        restart) the hash is rebuilt from the bytes already on disk.
+        """
+        hasher, hashed_bytes = self._hashers.get(upload.id, (None, -1))
+        
+        if hashed_bytes != upload.received_bytes:
+            hasher = hashlib.sha256()
+            remaining = upload.received_bytes
+            with open(upload.file_path, 'rb') as file:
+                while remaining > 0:
+                    block = file.read(min(self.read_size, remaining))
+                    if not block:
+                        break
+                    hasher.update(block)
+                    remaining -= len(block)
+        
+        return hasher
\ No newline at end of file
@@ -0,0 +1 @@
+# workers package
\ No newline at end of file
@@ -0,0 +1,376 @@
+import json
+import datetime
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from flask import current_app
+from sqlalchemy import insert, update
+
+from database import db, insert_ignoring_conflicts
+from models import Page, ExtractionRun, ExtractionResult, ExtractionFingerprint
+from extractors.rule_set import rule_definition_hash
+from processors.document_processor import hash_text
+from workers.job_queue import claim_next_queued, fail_stale_jobs
+
+
+# State inherited by forked chunk workers, set just before the pool starts
+_chunk_state = {}
+
+# Number of compiled rule sets kept by each worker process
+COMPILED_RULE_SET_CACHE_SIZE = 16
+
+# Number of page hashes looked up per fingerprint query, well below SQLite's bound parameter limit
+FINGERPRINT_LOOKUP_BATCH = 500
+
+
+class ExtractionRunHandler:
+    """Runs queued extraction runs, extracting documents in parallel chunks"""
+    
+    model = ExtractionRun
+    
+    def __init__(self, pattern_extractor, chunk_size=25, workers=1):
+        """
+        Initialize the handler
+        
+        Args:
+            pattern_extractor: PatternExtractor used to apply the rules
+            chunk_size: Number of documents extracted and committed together
+            workers: Number of processes extracting chunks in parallel (1 = inline)
+        """
+        self.pattern_extractor = pattern_extractor
+        self.chunk_size = max(1, chunk_size)
+        self.workers = max(1, workers)
+        # Compiled rules of recently used rule sets, by rule set id
+        self._compiled_rule_sets = OrderedDict()
+    
+    def enqueue(self, document_ids, rule_set, incremental=True):
+        """
+        Queue an extraction run
+        
+        Args:
+            document_ids: IDs of the documents to extract from
+            rule_set: Saved RuleSet whose rules are applied
+            incremental: Whether to reuse results of page/rule pairs computed by earlier runs
+            
+        Returns:
+            ExtractionRun: The queued run
+        """
+        run = ExtractionRun(
+            status='queued',
+            rule_set_id=rule_set.id,
+            incremental=incremental,
+            rules_json=json.dumps(rule_set.to_rules(), default=str),
+            document_ids_json=json.dumps([int(doc_id) for doc_id in document_ids]),
+            total_documents=len(document_ids)
+        )
+        db.session.add(run)
+        db.session.commit()
+        return run
+    
+    def claim_next(self):
+        """Claim the oldest queued run, returning its id or None"""
+        return claim_next_queued(ExtractionRun)
+    
+    def recover(self, stale_after):
+        """Fail runs whose worker died; the results of the chunks it committed are kept"""
+        fail_stale_jobs(ExtractionRun, stale_after)
+    
+    def run(self, run_id):
+        """
+        Execute a claimed run, committing the results of each chunk as it finishes
+        
+        Args:
+            run_id: ID of a run previously returned by claim_next
+        """
+        run = db.session.get(ExtractionRun, run_id)
+        rules = run.rules
+        document_ids = run.document_ids
+        chunks = [
+            document_ids[start:start + self.chunk_size]
+            for start in range(0, len(document_ids), self.chunk_size)
+        ]
+        
+        try:
+            rule_hashes = self._rule_hashes(rules)
+            rule_set = self._compile(run.rule_set_id, rules)
+            for chunk, (chunk_results, fingerprints, reused_pairs) in self._extract_chunks(
+                chunks, rule_set, rule_hashes, run.incremental
+            ):
+                self._save_chunk(run_id, rules, rule_hashes, chunk, chunk_results, fingerprints, reused_pairs)
+        except Exception as e:
+            db.session.rollback()
+            status, error = 'failed', str(e)
+        else:
+            status, error = 'completed', None
+        
+        db.session.execute(
+            update(ExtractionRun)
+            .where(ExtractionRun.id == run_id)
+            .values(status=status, error=error, finished_at=datetime.datetime.utcnow())
+        )
+        db.session.commit()
+    
+    def _rule_hashes(self, rules):
+        """Return the fingerprint of each rule under the current extractor settings"""
+        config_digests = {}
+        rule_hashes = []
+        
+        for rule in rules:
+            extraction_type = rule.get('extraction_type') or 'exact'
+            if extraction_type not in config_digests:
+                config_digests[extraction_type] = self.pattern_extractor.config_digest(extraction_type)
+            rule_hashes.append(rule_definition_hash(rule, config_digests[extraction_type]))
+        
+        return rule_hashes
+    
+    def _compile(self, rule_set_id, rules):
+        """Compile the rules of a run, reusing the compiled rules of a saved rule set"""
+        if rule_set_id is None:
+            return self.pattern_extractor.compile_rules(rules)
+        
+        compiled = self._compiled_rule_sets.get(rule_set_id)
+        if compiled is None:
+            compiled = self.pattern_extractor.compile_rules(rules)
+            self._compiled_rule_sets[rule_set_id] = compiled
+            if len(self._compiled_rule_sets) > COMPILED_RULE_SET_CACHE_SIZE:
+                self._compiled_rule_sets.popitem(last=False)
+        else:
+            self._compiled_rule_sets.move_to_end(rule_set_id)
+        
+        return compiled
+    
+    def _extract_chunks(self, chunks, rule_set, rule_hashes, incremental):
+        """Yield (chunk, extraction) pairs, using a process pool when configured"""
+        _chunk_state.update(
+            app=current_app._get_current_object(),
+            pattern_extractor=self.pattern_extractor,
+            rule_set=rule_set,
+            rule_hashes=rule_hashes,
+            incremental=incremental,
+            partial_rule_sets={}
+        )
+        
+        if self.workers == 1 or len(chunks) < 2:
+            for chunk in chunks:
+                yield chunk, _extract_chunk(chunk)
+            return
+        
+        # Chunk workers get _chunk_state by inheriting it, which only fork provides
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_chunk_worker
+        ) as executor:
+            futures = {executor.submit(_extract_chunk, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def _save_chunk(self, run_id, rules, rule_hashes, chunk, chunk_results, fingerprints, reused_pairs):
+        """Store the results and fingerprints of one chunk and advance the run's progress"""
+        rows = [
+            {
+                'document_id': result['document_id'],
+                'rule_id': rules[result.get('rule_index', 0)]['rule_id'],
+                'run_id': run_id,
+                'page_number': result.get('page_number', 1),
+                'value': result.get('value', ''),
+                'context': result.get('context', ''),
+                'page_hash': result.get('page_hash'),
+                'rule_hash': rule_hashes[result.get('rule_index', 0)]
+            }
+            for result in chunk_results
+            if result.get('rule_index', 0) < len(rules)
+        ]
+        
+        # One executemany insert per chunk instead of an ORM object per result
+        if rows:
+            db.session.execute(insert(ExtractionResult), rows)
+        
+        # Record the newly computed pairs; another run may have recorded the same ones meanwhile
+        if fingerprints:
+            db.session.execute(insert_ignoring_conflicts(ExtractionFingerprint), [
+                {'page_hash': page_hash, 'rule_hash': rule_hash, 'results_json': json.dumps(pair_results)}
+                for (page_hash, rule_hash), pair_results in fingerprints.items()
+            ])
+        
+        db.session.execute(
+            update(ExtractionRun)
+            .where(ExtractionRun.id == run_id)
+            .values(
+                processed_documents=ExtractionRun.processed_documents + len(chunk),
+                result_count=ExtractionRun.result_count + len(rows),
+                reused_pairs=ExtractionRun.reused_pairs + reused_pairs
+            )
+        )
+        db.session.commit()
+
+
+def _init_chunk_worker():
+    """Give a forked chunk worker its own app context and database connections"""
+    _chunk_state['app'].app_context().push()
+    db.engine.dispose(close=False)
+    
+    # Chunks already run in parallel, and pool workers can't start nested pools
+    _chunk_state['pattern_extractor'].nlp_n_process = 1
+
+
+def _extract_chunk(document_ids):
+    """
+    Extract data from a chunk of documents, reusing fingerprinted results
+    
+    Each (page content hash, rule definition hash) pair that an earlier run
+    already computed is copied from its fingerprint. The remaining rules are
+    applied only to the pages that still need them, grouped so that pages
+    missing the same rules are extracted together.
+    
+    Args:
+        document_ids: IDs of the documents in the chunk
+        
+    Returns:
+        tuple: (results, fingerprints, reused_pairs) where results carry the
+            document_id and page_hash they belong to, and fingerprints maps the
+            newly computed (page_hash, rule_hash) pairs to their results
+    """
+    rule_hashes = _chunk_state['rule_hashes']
+    all_rules = tuple(range(len(rule_hashes)))
+    
+    pages = db.session.query(Page.document_id, Page.page_number, Page.content_hash).filter(
+        Page.document_id.in_(document_ids)
+    ).order_by(Page.document_id, Page.page_number).all()
+    
+    # Pages stored before content hashes were recorded are hashed from their text
+    contents = {}
+    if any(content_hash is None for _, _, content_hash in pages):
+        contents = _load_contents(document_ids, Page.content_hash.is_(None))
+    page_hashes = {
+        (document_id, page_number): content_hash or hash_text(contents[(document_id, page_number)])
+        for document_id, page_number, content_hash in pages
+    }
+    
+    known = _load_fingerprints(set(page_hashes.values()), set(rule_hashes)) if _chunk_state['incremental'] else {}
+    
+    chunk_results = []
+    reused_pairs = 0
+    groups = {}
+    
+    for page_key, page_hash in page_hashes.items():
+        missing = []
+        for rule_index, rule_hash in enumerate(rule_hashes):
+            pair_results = known.get((page_hash, rule_hash))
+            if pair_results is None:
+                missing.append(rule_index)
+                continue
+            
+            reused_pairs += 1
+            for pair_result in pair_results:
+                chunk_results.append(dict(
+                    pair_result,
+                    document_id=page_key[0],
+                    page_number=page_key[1],
+                    rule_index=rule_index,
+                    page_hash=page_hash
+                ))
+        
+        if missing:
+            groups.setdefault(tuple(missing), []).append(page_key)
+    
+    # Load the text of the documents with pages that still need extracting
+    pending = {page_key for group in groups.values() for page_key in group}
+    if pending - contents.keys():
+        pending_documents = {document_id for document_id, _ in pending}
+        contents.update(_load_contents(list(pending_documents)))
+    
+    fingerprints = {}
+    
+    for rule_indexes, page_keys in groups.items():
+        rule_set = _chunk_state['rule_set'] if rule_indexes == all_rules else _partial_rule_set(rule_indexes)
+        
+        documents = {}
+        for document_id, page_number in page_keys:
+            document = documents.setdefault(document_id, {'id': document_id, 'pages': {}})
+            document['pages'][page_number] = contents[(document_id, page_number)]
+        
+        doc_list = list(documents.values())
+        all_results = _chunk_state['pattern_extractor'].extract_from_documents(doc_list, rule_set)
+        
+        # Every extracted pair gets a fingerprint, including the ones with no results;
+        # identical pages share one, filled from the first page that has the hash
+        owners = {}
+        for page_key in page_keys:
+            owners.setdefault(page_hashes[page_key], page_key)
+            for rule_index in rule_indexes:
+                fingerprints.setdefault((page_hashes[page_key], rule_hashes[rule_index]), [])
+        
+        for document, results in zip(doc_list, all_results):
+            for result in results:
+                page_key = (document['id'], result['page_number'])
+                page_hash = page_hashes[page_key]
+                rule_index = rule_indexes[result['rule_index']]
+                
+                if owners[page_hash] == page_key:
+                    fingerprints[(page_hash, rule_hashes[rule_index])].append(
+                        {'value': result.get('value', ''), 'context': result.get('context', '')}
+                    )
+                
+                chunk_results.append(dict(
+                    result,
+                    document_id=document['id'],
+                    rule_index=rule_index,
+                    page_hash=page_hash
+                ))
+    
+    # Keep results in document, page, then rule order, as when everything was extracted at once
+    document_order = {document_id: position for position, document_id in enumerate(document_ids)}
+    chunk_results.sort(key=lambda result: (
+        document_order[result['document_id']],
+        result['page_number'],
+        result['rule_index']
+    ))
+    
+    db.session.remove()
+    return chunk_results, fingerprints, reused_pairs
+
+
+def _load_contents(document_ids, *criteria):
+    """Return {(document_id, page_number): content} for the pages of some documents"""
+    pages = db.session.query(Page.document_id, Page.page_number, Page.content).filter(
+        Page.document_id.in_(document_ids),
+        *criteria
+    )
+    return {(document_id, page_number): content or '' for document_id, page_number, content in pages}
+
+
+def _load_fingerprints(page_hashes, rule_hashes):
+    """Return {(page_hash, rule_hash): results} for the pairs of these pages and rules already computed"""
+    page_hashes = list(page_hashes)
+    rule_hashes = list(rule_hashes)
+    known = {}
+    
+    for start in range(0, len(page_hashes), FINGERPRINT_LOOKUP_BATCH):
+        rows = db.session.query(
+            ExtractionFingerprint.page_hash,
+            ExtractionFingerprint.rule_hash,
+            ExtractionFingerprint.results_json
+        ).filter(
+            ExtractionFingerprint.page_hash.in_(page_hashes[start:start + FINGERPRINT_LOOKUP_BATCH]),
+            ExtractionFingerprint.rule_hash.in_(rule_hashes)
+        )
+        
+        for page_hash, rule_hash, results_json in rows:
+            known[(page_hash, rule_hash)] = json.loads(results_json)
+    
+    return known
+
+
+def _partial_rule_set(rule_indexes):
+    """Compile the subset of the run's rules that some pages still need, once per chunk worker"""
+    partial_rule_sets = _chunk_state['partial_rule_sets']
+    
+    if rule_indexes not in partial_rule_sets:
+        rules = _chunk_state['rule_set'].rules
+        partial_rule_sets[rule_indexes] = _chunk_state['pattern_extractor'].compile_rules(
+            [rules[rule_index] for rule_index in rule_indexes]
+        )
+    
+    return partial_rule_sets[rule_indexes]
\ No newline at end of file
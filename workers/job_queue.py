@@ -0,0 +1,332 @@
+import os
+import sys
+import time
+import atexit
+import signal
+import datetime
+import threading
+import contextlib
+import multiprocessing
+
+from sqlalchemy import update
+
+from database import db
+from models import IngestionJob
+from processors.document_processor import hash_file
+
+
+class IngestionJobHandler:
+    """Runs queued ingestion jobs through the document processor"""
+
+    model = IngestionJob
+
+    def __init__(self, document_processor):
+        """Initialize with the document processor used to extract pages"""
+        self.document_processor = document_processor
+
+    def enqueue(self, file_path, filename, content_hash=None, force=False):
+        """
+        Queue an uploaded file for background processing
+
+        Args:
+            file_path: Path to the saved upload
+            filename: Original filename
+            content_hash: SHA-256 of the file if it was computed during upload
+            force: Process the file even if an identical one was processed before
+
+        Returns:
+            IngestionJob: The queued job
+        """
+        job = IngestionJob(
+            filename=filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            force=force,
+            status='queued'
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim_next(self):
+        """Claim the oldest queued job, returning its id or None"""
+        return claim_next_queued(IngestionJob)
+
+    def recover(self, stale_after):
+        """Fail jobs whose worker died and remove the documents they left half-ingested"""
+        fail_stale_jobs(IngestionJob, stale_after)
+        self.document_processor.delete_abandoned_documents()
+
+    def run(self, job_id):
+        """
+        Process a claimed job and record its outcome
+
+        Args:
+            job_id: ID of a job previously returned by claim_next
+        """
+        job = db.session.get(IngestionJob, job_id)
+
+        # The hash identifies the document this job creates while it is running
+        if not job.content_hash and os.path.exists(job.file_path):
+            job.content_hash = hash_file(job.file_path)
+            db.session.commit()
+
+        def report_progress(processed_pages, total_pages):
+            db.session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(processed_pages=processed_pages, total_pages=total_pages)
+            )
+            db.session.commit()
+
+        try:
+            document_id, page_count, cache_hit = self.document_processor.process(
+                job.file_path,
+                job.filename,
+                progress_callback=report_progress,
+                content_hash=job.content_hash,
+                force=bool(job.force)
+            )
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(IngestionJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+        else:
+            job = db.session.get(IngestionJob, job_id)
+            job.status = 'completed'
+            job.document_id = document_id
+            job.cache_hit = cache_hit
+            job.total_pages = page_count
+            job.processed_pages = page_count
+
+        job.finished_at = datetime.datetime.utcnow()
+        db.session.commit()
+
+
+class WorkerPool:
+    """Pool of local worker processes that poll the database for queued work"""
+
+    def __init__(self, app, handlers, workers=2, poll_interval=1.0, heartbeat_interval=30.0, stale_after=300.0):
+        """
+        Initialize the pool
+
+        Args:
+            app: Flask application providing the database configuration
+            handlers: Objects exposing model, claim_next(), run(job_id) and recover(stale_after)
+            workers: Number of worker processes to start
+            poll_interval: Seconds to sleep when no work is queued
+            heartbeat_interval: Seconds between heartbeats of a running job
+            stale_after: Seconds without a heartbeat after which a running job is
+                considered abandoned by its worker and failed
+        """
+        self.app = app
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._processes = []
+        self._owner_pid = None
+
+        atexit.register(self.stop)
+
+    def ensure_started(self):
+        """Start the worker processes once per owning process, replacing any that died"""
+        if self._owner_pid != os.getpid():
+            self._owner_pid = os.getpid()
+            self._processes = [None] * self.workers
+
+        dead = [index for index, process in enumerate(self._processes) if process is None or not process.is_alive()]
+        if not dead:
+            return
+
+        # Jobs left running by a killed server or a crashed worker would otherwise never finish
+        with self.app.app_context():
+            _recover(self.handlers, self.stale_after)
+
+        # Workers are forked so they inherit the configured app and processors.
+        # They are not daemonic because processors may start their own pools.
+        context = multiprocessing.get_context('fork')
+        for index in dead:
+            process = context.Process(
+                target=_worker_loop,
+                args=(self.app, self.handlers, self.poll_interval, self._owner_pid,
+                      self.heartbeat_interval, self.stale_after),
+                name=f'docprocessor-worker-{index}',
+                daemon=False
+            )
+            process.start()
+            self._processes[index] = process
+
+    def stop(self):
+        """Terminate the worker processes started by this process"""
+        if self._owner_pid != os.getpid():
+            return
+
+        processes = [process for process in self._processes if process is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+
+        self._processes = []
+
+    def run_forever(self, check_interval=5.0):
+        """
+        Run the pool in the foreground, replacing workers that die
+
+        Args:
+            check_interval: Seconds between checks of the worker processes
+        """
+        try:
+            while True:
+                self.ensure_started()
+                time.sleep(check_interval)
+        finally:
+            self.stop()
+
+
+def claim_next_queued(model):
+    """
+    Claim the oldest queued row of a job table
+
+    The conditional UPDATE makes the claim atomic, so several worker
+    processes can poll the same table without running a job twice.
+
+    Args:
+        model: Model with id, status, started_at and heartbeat_at columns
+
+    Returns:
+        int: The claimed id, or None if there is nothing to do
+    """
+    job_id = db.session.query(model.id).filter_by(
+        status='queued'
+    ).order_by(model.id).limit(1).scalar()
+
+    if job_id is None:
+        return None
+
+    now = datetime.datetime.utcnow()
+    claimed = db.session.execute(
+        update(model)
+        .where(model.id == job_id, model.status == 'queued')
+        .values(status='running', started_at=now, heartbeat_at=now)
+    )
+    db.session.commit()
+
+    return job_id if claimed.rowcount == 1 else None
+
+
+def fail_stale_jobs(model, stale_after):
+    """
+    Fail running jobs whose heartbeat stopped, e.g. because their worker was killed
+
+    Args:
+        model: Model with status, started_at, heartbeat_at, error and finished_at columns
+        stale_after: Seconds without a heartbeat after which a job is abandoned
+
+    Returns:
+        int: Number of jobs failed
+    """
+    now = datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(seconds=stale_after)
+
+    result = db.session.execute(
+        update(model)
+        .where(model.status == 'running', db.func.coalesce(model.heartbeat_at, model.started_at) < cutoff)
+        .values(status='failed', error='The worker stopped before the job finished', finished_at=now)
+    )
+    db.session.commit()
+
+    return result.rowcount
+
+
+def _recover(handlers, stale_after):
+    """Let each handler clean up after workers that died"""
+    for handler in handlers:
+        try:
+            handler.recover(stale_after)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Worker error recovering {type(handler).__name__}: {str(e)}")
+
+
+@contextlib.contextmanager
+def _heartbeat(engine, model, job_id, interval):
+    """Refresh a claimed job's heartbeat_at from a background thread while it runs"""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                # Its own connection, so the job's transactions aren't touched
+                with engine.begin() as connection:
+                    connection.execute(
+                        update(model)
+                        .where(model.id == job_id)
+                        .values(heartbeat_at=datetime.datetime.utcnow())
+                    )
+            except Exception as e:
+                print(f"Warning: Could not record heartbeat of {model.__name__} {job_id}: {str(e)}")
+
+    thread = threading.Thread(target=beat, name=f'heartbeat-{job_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _worker_loop(app, handlers, poll_interval, parent_pid, heartbeat_interval, stale_after):
+    """Poll each handler for work until the parent process goes away"""
+    # The pool process turns SIGTERM into an exit; its workers just stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    with app.app_context():
+        # Never reuse database connections inherited from the parent
+        db.engine.dispose(close=False)
+        engine = db.engine
+        last_recovery = time.monotonic()
+
+        while os.getppid() == parent_pid:
+            did_work = False
+
+            for handler in handlers:
+                try:
+                    job_id = handler.claim_next()
+                    if job_id is not None:
+                        with _heartbeat(engine, handler.model, job_id, heartbeat_interval):
+                            handler.run(job_id)
+                        did_work = True
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Worker error in {type(handler).__name__}: {str(e)}")
+                finally:
+                    db.session.remove()
+
+            # Catch the jobs of workers that died while this one kept running
+            if time.monotonic() - last_recovery >= stale_after:
+                _recover(handlers, stale_after)
+                db.session.remove()
+                last_recovery = time.monotonic()
+
+            if not did_work:
+                time.sleep(poll_interval)
+
+
+
+def main():
+    """Run the ingestion and extraction workers: python -m workers.job_queue"""
+    # Imported here because the app imports this module
+    from app import worker_pool
+
+    # Let the finally block of run_forever stop the workers
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    worker_pool.run_forever()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
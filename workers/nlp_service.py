@@ -0,0 +1,306 @@
+import os
+import stat
+import time
+import queue
+import argparse
+import tempfile
+import threading
+from multiprocessing.connection import Listener, Client
+
+from extractors.nlp_extractor import NLPExtractor, load_pattern_library
+
+
+class NLPService:
+    """Long-lived process that holds the spaCy model and serves extraction requests over a Unix socket"""
+    
+    def __init__(self, socket_path, authkey, batch_window=0.01, max_batch_items=512,
+                 batch_size=64, n_process=1, sentence_top_k=5, pattern_library=None):
+        """
+        Initialize the service
+        
+        Args:
+            socket_path: Path of the Unix socket to listen on
+            authkey: Shared secret clients must present
+            batch_window: Seconds to wait for more requests before running a batch
+            max_batch_items: Maximum number of (text, instructions) items per batch
+            batch_size: Batch size passed to nlp.pipe
+            n_process: Number of processes used by nlp.pipe
+            sentence_top_k: Candidate sentences per page parsed by spaCy (0 = whole pages)
+            pattern_library: Typed value pattern families (defaults to PATTERN_LIBRARY)
+        """
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self.batch_window = batch_window
+        self.max_batch_items = max_batch_items
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.extractor = NLPExtractor(sentence_top_k=sentence_top_k, pattern_library=pattern_library)
+        self._requests = queue.Queue()
+    
+    def serve_forever(self):
+        """Load the model, then accept clients until the process is stopped"""
+        self.extractor.load()
+        
+        _ensure_private_directory(os.path.dirname(os.path.abspath(self.socket_path)))
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        
+        threading.Thread(target=self._batch_loop, name='nlp-batcher', daemon=True).start()
+        
+        # Clients send pickles, so only this user may connect: create the socket
+        # without group/other permissions instead of fixing them up afterwards
+        old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+        finally:
+            os.umask(old_umask)
+        os.chmod(self.socket_path, 0o600)
+        
+        with listener:
+            print(f"NLP service listening on {self.socket_path}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    print(f"Warning: Rejected NLP service client: {str(e)}")
+                    continue
+                
+                # Greet each client with the digest its extraction results are fingerprinted with
+                try:
+                    connection.send(('config', self.extractor.config_digest()))
+                except (EOFError, OSError):
+                    connection.close()
+                    continue
+                
+                threading.Thread(target=self._read_loop, args=(connection,), daemon=True).start()
+    
+    def _read_loop(self, connection):
+        """Queue the requests sent by one client until it disconnects"""
+        send_lock = threading.Lock()
+        
+        try:
+            while True:
+                request_id, items = connection.recv()
+                self._requests.put((connection, send_lock, request_id, items))
+        except (EOFError, OSError):
+            connection.close()
+    
+    def _batch_loop(self):
+        """Merge requests that arrive within the batch window into one extract_many call"""
+        while True:
+            batch = [self._requests.get()]
+            item_count = len(batch[0][3])
+            deadline = time.monotonic() + self.batch_window
+            
+            while item_count < self.max_batch_items:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                item_count += len(request[3])
+            
+            self._run_batch(batch)
+    
+    def _run_batch(self, batch):
+        """Extract a merged batch and send each client the slice of results it asked for"""
+        items = [item for _, _, _, request_items in batch for item in request_items]
+        
+        try:
+            results = self.extractor.extract_many(items, batch_size=self.batch_size, n_process=self.n_process)
+            error = None
+        except Exception as e:
+            results = []
+            error = str(e)
+        
+        offset = 0
+        for connection, send_lock, request_id, request_items in batch:
+            if error is None:
+                response = (request_id, results[offset:offset + len(request_items)], None)
+            else:
+                response = (request_id, None, error)
+            offset += len(request_items)
+            
+            try:
+                with send_lock:
+                    connection.send(response)
+            except (EOFError, OSError):
+                pass
+
+
+class NLPServiceClient:
+    """Drop-in replacement for NLPExtractor that sends work to an NLPService"""
+    
+    def __init__(self, socket_path, authkey, connect_timeout=30.0):
+        """
+        Initialize the client; the connection is opened on first use
+        
+        Args:
+            socket_path: Path of the service's Unix socket
+            authkey: Shared secret configured on the service
+            connect_timeout: Seconds to keep retrying while the service starts
+        """
+        self.socket_path = socket_path
+        self.authkey = authkey
+        self.connect_timeout = connect_timeout
+        self._connection = None
+        self._connection_pid = None
+        self._config_digest = None
+        self._lock = threading.Lock()
+        self._next_request_id = 0
+    
+    @property
+    def loaded(self):
+        return True
+    
+    def load(self):
+        """The model lives in the service, so there is nothing to load locally"""
+    
+    def clear_caches(self):
+        """Parses are cached by the service"""
+    
+    def config_digest(self):
+        """Return the digest of the service's extractor settings, sent when connecting"""
+        with self._lock:
+            self._connect()
+            return self._config_digest
+    
+    def extract_from_text(self, text, instructions):
+        """
+        Extract information from text based on natural language instructions
+        
+        Args:
+            text: The text to extract from
+            instructions: Natural language instructions for what to extract
+            
+        Returns:
+            dict: Extracted information with value and context
+        """
+        return self.extract_many([(text, instructions)])[0]
+    
+    def extract_many(self, items, batch_size=64, n_process=1):
+        """
+        Extract information for many (text, instructions) pairs
+        
+        batch_size and n_process are accepted for compatibility with NLPExtractor;
+        the service uses its own settings and batches requests from all clients.
+        
+        Args:
+            items: Iterable of (text, instructions) tuples
+            
+        Returns:
+            list: Extracted information dicts, in the same order as items
+        """
+        items = list(items)
+        if not items:
+            return []
+        
+        with self._lock:
+            connection = self._connect()
+            self._next_request_id += 1
+            request_id = self._next_request_id
+            
+            try:
+                connection.send((request_id, items))
+                response_id, results, error = connection.recv()
+            except (EOFError, OSError):
+                # Reconnect on the next call, e.g. after the service restarted
+                self._connection = None
+                raise
+        
+        if error is not None:
+            raise RuntimeError(f"NLP service failed: {error}")
+        if response_id != request_id:
+            self._connection = None
+            raise RuntimeError("NLP service returned a response for another request")
+        
+        return results
+    
+    def _connect(self):
+        """Return this process's connection, opening it if needed"""
+        # A connection inherited through fork is shared with the parent, so open a new one
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+        
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                connection = Client(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+                _, self._config_digest = connection.recv()
+                self._connection = connection
+                self._connection_pid = os.getpid()
+                return self._connection
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise ConnectionError(f"NLP service is not running at {self.socket_path}")
+                time.sleep(0.5)
+
+
+def service_authkey():
+    """
+    Return the shared secret for the NLP service socket
+    
+    The service unpickles what clients send, so there is no default: set
+    NLP_SERVICE_AUTHKEY, or let gunicorn.conf.py generate one for the service
+    and its workers.
+    
+    Returns:
+        bytes: The key from NLP_SERVICE_AUTHKEY
+    """
+    authkey = os.environ.get('NLP_SERVICE_AUTHKEY')
+    if not authkey:
+        raise RuntimeError("NLP_SERVICE_AUTHKEY must be set to use the NLP service")
+    return authkey.encode('utf-8')
+
+
+def default_socket_path():
+    """Return a socket path inside a per-user directory"""
+    return os.path.join(tempfile.gettempdir(), f'docprocessor-nlp-{os.getuid()}', 'nlp.sock')
+
+
+def _ensure_private_directory(path):
+    """
+    Create the socket's directory if needed and check only this user can use it
+    
+    Args:
+        path: Directory that will hold the socket
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) & 0o077:
+        raise RuntimeError(
+            f"NLP service socket directory {path} must be owned by this user and not "
+            f"accessible to group or others (chmod 700)"
+        )
+
+
+def main():
+    """Run the NLP service: python -m workers.nlp_service"""
+    parser = argparse.ArgumentParser(description='Serve spaCy extraction requests over a Unix socket')
+    parser.add_argument('--socket', default=os.environ.get('NLP_SERVICE_SOCKET') or default_socket_path())
+    parser.add_argument('--batch-window', type=float, default=float(os.environ.get('NLP_SERVICE_BATCH_WINDOW', 0.01)))
+    parser.add_argument('--max-batch-items', type=int, default=int(os.environ.get('NLP_SERVICE_MAX_BATCH_ITEMS', 512)))
+    parser.add_argument('--batch-size', type=int, default=int(os.environ.get('NLP_BATCH_SIZE', 64)))
+    parser.add_argument('--n-process', type=int, default=int(os.environ.get('NLP_N_PROCESS', 1)))
+    parser.add_argument('--sentence-top-k', type=int, default=int(os.environ.get('NLP_SENTENCE_TOP_K', 5)))
+    parser.add_argument('--pattern-library', default=os.environ.get('NLP_PATTERN_LIBRARY'))
+    args = parser.parse_args()
+    
+    NLPService(
+        args.socket,
+        service_authkey(),
+        batch_window=args.batch_window,
+        max_batch_items=args.max_batch_items,
+        batch_size=args.batch_size,
+        n_process=args.n_process,
+        sentence_top_k=args.sentence_top_k,
+        pattern_library=load_pattern_library(args.pattern_library)
+    ).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file